@@ -4,6 +4,12 @@ from src.ai_agent import SustainabilityAgent
 def main() -> None:
     agent = SustainabilityAgent()
 
+    # Load all four indicators before the first question
+    try:
+        agent.prewarm()
+    except Exception as exc:
+        print(f"[Warning] Could not preload indicator data: {exc}")
+
     print("=" * 60)
     print("Sustainability GRI AI Agent")
     print("Type your question in English.")
@@ -11,6 +17,7 @@ def main() -> None:
     print("  - Show me the energy consumption KPIs for 2024")
     print("  - Provide a GRI-style narrative for water usage in 2023")
     print("  - Summarize GHG emissions in line with GRI 305 for 2025")
+    print("Separate several questions with ';' to answer them together.")
     print("Type 'q' or 'quit' to exit.")
     print("=" * 60)
 
@@ -23,10 +30,21 @@ def main() -> None:
             print("\nAgent: Session ended. Goodbye.")
             break
 
+        questions = [q.strip() for q in query.split(";") if q.strip()]
+        if not questions:
+            continue
+
         try:
-            answer = agent.answer(query)
-            print("\nAgent:\n")
-            print(answer)
+            if len(questions) > 1:
+                answers = agent.answer_many(questions)
+            else:
+                answers = [agent.answer(questions[0])]
+
+            for question, answer in zip(questions, answers):
+                print("\nAgent:\n")
+                if len(questions) > 1:
+                    print(f"Q: {question}\n")
+                print(answer)
         except Exception as exc:
             print(f"\n[Error] {exc}")
 
@@ -1,6 +1,4 @@
 import streamlit as st
-import fitz  # PyMuPDF
-import pandas as pd
 import os
 from dotenv import load_dotenv
 from groq import Groq
@@ -52,6 +50,9 @@ with col1:
 
     if pdf_file:
         try:
+            # Imported on first upload: the chat itself needs no PDF reader
+            import fitz  # PyMuPDF
+
             with fitz.open(stream=pdf_file.read(), filetype="pdf") as doc:
                 full_text = ""
                 for page in doc:
@@ -73,6 +74,8 @@ with col2:
 
     if excel_files:
         try:
+            import pandas as pd
+
             excel_text_combined = ""
 
             for file in excel_files:
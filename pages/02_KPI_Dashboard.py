@@ -1,17 +1,15 @@
+import os
 import streamlit as st
 import plotly.graph_objects as go
-import plotly.express as px
+from plotly.subplots import make_subplots
 import numpy as np
 import pandas as pd
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
 
 from src.data_loader import (
     list_available_years,
     get_kpi_block,
 )
+from src.kpi_service import batch_linear_forecast
 
 st.set_page_config(
     page_title="Sustainability KPI Dashboard",
@@ -106,7 +104,7 @@ st.markdown("---")
 st.subheader("🧭 KPI Gauges")
 
 def draw_gauge(title, value, unit):
-    fig = go.Figure(go.Indicator(
+    return go.Indicator(
         mode="gauge+number",
         value=value,
         number={"suffix": f" {unit}"},
@@ -115,15 +113,19 @@ def draw_gauge(title, value, unit):
             "axis": {"range": [0, max(100, value * 1.5)]},
             "bar": {"color": "#1f77b4"},
         }
-    ))
-    return fig
+    )
+
+# ✅ one figure for all four gauges (single chart payload)
+gauge_fig = make_subplots(rows=1, cols=4, specs=[[{"type": "indicator"}] * 4])
 
-g1, g2, g3, g4 = st.columns(4)
+for i, (title, block) in enumerate(
+    [("Energy", energy), ("Water", water), ("Emissions", emission), ("Waste", waste)],
+    start=1,
+):
+    gauge_fig.add_trace(draw_gauge(title, block["total"], block["unit"]), row=1, col=i)
 
-g1.plotly_chart(draw_gauge("Energy", energy["total"], energy["unit"]), use_container_width=True)
-g2.plotly_chart(draw_gauge("Water", water["total"], water["unit"]), use_container_width=True)
-g3.plotly_chart(draw_gauge("Emissions", emission["total"], emission["unit"]), use_container_width=True)
-g4.plotly_chart(draw_gauge("Waste", waste["total"], waste["unit"]), use_container_width=True)
+gauge_fig.update_layout(height=300)
+st.plotly_chart(gauge_fig, use_container_width=True)
 
 st.markdown("---")
 
@@ -132,30 +134,42 @@ st.markdown("---")
 # =========================
 st.subheader("📈 Monthly KPI Trends")
 
-def monthly_chart(title, monthly, unit):
+trend_blocks = [
+    ("Energy Trend", energy),
+    ("Water Trend", water),
+    ("Emissions Trend", emission),
+    ("Waste Trend", waste),
+]
+
+# ✅ 2×2 grid in one figure instead of four separate charts
+trend_fig = make_subplots(rows=2, cols=2, subplot_titles=[t for t, _ in trend_blocks])
+
+for i, (title, block) in enumerate(trend_blocks):
+    row, col = divmod(i, 2)
+    monthly = block["monthly"]
+
     if not monthly:
-        fig = go.Figure()
-        fig.add_annotation(text="No Monthly Data", showarrow=False)
-        return fig
-
-    months = list(range(1, len(monthly) + 1))
-    fig = px.line(
-        x=months,
-        y=monthly,
-        markers=True,
-        labels={"x": "Month", "y": unit},
-        title=title,
-    )
-    fig.update_traces(mode="lines+markers")
-    return fig
+        trend_fig.add_annotation(
+            text="No Monthly Data", showarrow=False,
+            xref=f"x{i + 1 if i else ''} domain", yref=f"y{i + 1 if i else ''} domain",
+            x=0.5, y=0.5,
+        )
+        continue
 
-c1, c2 = st.columns(2)
-c3, c4 = st.columns(2)
+    trend_fig.add_trace(
+        go.Scatter(
+            x=list(range(1, len(monthly) + 1)),
+            y=monthly,
+            mode="lines+markers",
+            name=title,
+        ),
+        row=row + 1, col=col + 1,
+    )
+    trend_fig.update_xaxes(title_text="Month", row=row + 1, col=col + 1)
+    trend_fig.update_yaxes(title_text=block["unit"], row=row + 1, col=col + 1)
 
-c1.plotly_chart(monthly_chart("Energy Trend", energy["monthly"], energy["unit"]), use_container_width=True)
-c2.plotly_chart(monthly_chart("Water Trend", water["monthly"], water["unit"]), use_container_width=True)
-c3.plotly_chart(monthly_chart("Emissions Trend", emission["monthly"], emission["unit"]), use_container_width=True)
-c4.plotly_chart(monthly_chart("Waste Trend", waste["monthly"], waste["unit"]), use_container_width=True)
+trend_fig.update_layout(height=700, showlegend=False)
+st.plotly_chart(trend_fig, use_container_width=True)
 
 st.markdown("---")
 
@@ -173,16 +187,29 @@ kpi_map = {
     "Waste": waste,
 }
 
+# ✅ z-scores for all four KPIs in one pass (rows padded with NaN)
+monthly_rows = [kpi_map[k]["monthly"] for k in kpi_map]
+monthly_matrix = np.full((len(monthly_rows), max(map(len, monthly_rows))), np.nan)
+for i, row in enumerate(monthly_rows):
+    monthly_matrix[i, :len(row)] = row
+
+with np.errstate(invalid="ignore", divide="ignore"):
+    valid = np.isfinite(monthly_matrix)
+    n_valid = valid.sum(axis=1, keepdims=True)
+    mean_vals = np.where(valid, monthly_matrix, 0).sum(axis=1, keepdims=True) / n_valid
+    std_vals = np.sqrt(
+        np.where(valid, (monthly_matrix - mean_vals) ** 2, 0).sum(axis=1, keepdims=True) / n_valid
+    )
+    z_matrix = (monthly_matrix - mean_vals) / std_vals
+
 series = kpi_map[anomaly_kpi]["monthly"]
 
 if series and len(series) >= 6:
 
-    values = np.array(series)
-    mean_val = values.mean()
-    std_val = values.std()
-
-    z = (values - mean_val) / std_val
-    anomaly_idx = np.where(np.abs(z) > 2)[0]
+    row_idx = list(kpi_map).index(anomaly_kpi)
+    values = monthly_matrix[row_idx, :len(series)]
+    z = z_matrix[row_idx, :len(series)]
+    anomaly_idx = np.flatnonzero(np.abs(z) > 2)
 
     months = list(range(1, len(series) + 1))
 
@@ -229,15 +256,24 @@ compare_years = st.multiselect(
     default=years[-3:] if len(years) >= 3 else years
 )
 
-def get_kpi_total_by_year(year, kpi_name):
-    k = get_kpi_block(int(year), kpi_name)
-    return k["total"]
+@st.cache_data(show_spinner=False)
+def kpi_totals_table(year_list, file_mtimes):
+    # Year × KPI totals, built once and then read by index; file_mtimes
+    # only keys the cache, so an edited or replaced workbook rebuilds it
+    kpi_names = ["Energy", "Water", "Emissions", "Waste"]
+    return pd.DataFrame(
+        {k: [get_kpi_block(int(y), k)["total"] for y in year_list] for k in kpi_names},
+        index=list(year_list),
+    )
+
+kpi_totals = kpi_totals_table(
+    tuple(years),
+    tuple(os.stat(years_dict[y]).st_mtime_ns for y in years),
+)
 
-comparison_data = []
-for y in compare_years:
-    comparison_data.append(get_kpi_total_by_year(y, compare_kpi))
+comparison_data = kpi_totals.loc[compare_years, compare_kpi].to_numpy(dtype=float)
 
-if compare_years and comparison_data:
+if compare_years and len(comparison_data):
 
     compare_fig = go.Figure()
     compare_fig.add_trace(
@@ -271,20 +307,16 @@ predict_kpi = st.selectbox("Select KPI for Prediction", ["Energy", "Water", "Emi
 
 hist_years = sorted(years)
 
-hist_values = []
-for y in hist_years:
-    hist_values.append(get_kpi_total_by_year(y, predict_kpi))
+hist_values = kpi_totals.loc[hist_years, predict_kpi].to_numpy(dtype=float)
 
 if len(hist_years) >= 3:
 
     x = np.array(hist_years)
     y = np.array(hist_values)
 
-    coeff = np.polyfit(x, y, 1)
-    model = np.poly1d(coeff)
-
     next_year = hist_years[-1] + 1
-    predicted_value = model(next_year)
+    # Closed-form least-squares line (no Vandermonde / LAPACK solve)
+    predicted_value = float(batch_linear_forecast(x, y, next_year)[0])
 
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=hist_years, y=y, mode="lines+markers", name="Historical"))
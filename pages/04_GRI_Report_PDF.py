@@ -5,13 +5,6 @@ import pandas as pd
 import tempfile
 from datetime import datetime
 
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, Image, PageBreak
-)
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER
-
 from src.email_sender import send_pdf_via_email
 
 
@@ -65,7 +58,7 @@ year_df = df[df["Year"] == year_number]
 # =========================
 # ✅ SAFE KPI EXTRACTOR (LONG FORMAT)
 # =========================
-def get_kpi_block(keyword):
+def get_kpi_block(year_df, keyword):
     block = year_df[year_df["Indicator"].astype(str).str.contains(keyword, case=False, na=False)]
 
     if block.empty:
@@ -81,15 +74,22 @@ def get_kpi_block(keyword):
     return total, monthly, unit
 
 
-energy_total, energy_monthly, energy_unit       = get_kpi_block("Energy")
-water_total, water_monthly, water_unit          = get_kpi_block("Water")
-emission_total, emission_monthly, emission_unit = get_kpi_block("Emission")
-waste_total, waste_monthly, waste_unit          = get_kpi_block("Waste")
-
 # =========================
 # ✅ FINAL PDF GENERATOR (ALL PAGES)
 # =========================
-def build_full_gri_report():
+def build_full_gri_report(year_df, year_number, logo_path, generated_on):
+    # reportlab is only loaded once a report is actually requested
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import (
+        SimpleDocTemplate, Paragraph, Spacer, Table, Image, PageBreak
+    )
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_CENTER
+
+    energy_total, energy_monthly, energy_unit       = get_kpi_block(year_df, "Energy")
+    water_total, water_monthly, water_unit          = get_kpi_block(year_df, "Water")
+    emission_total, emission_monthly, emission_unit = get_kpi_block(year_df, "Emission")
+    waste_total, waste_monthly, waste_unit          = get_kpi_block(year_df, "Waste")
 
     styles = getSampleStyleSheet()
 
@@ -111,8 +111,8 @@ def build_full_gri_report():
     # =========================
     elements.append(Spacer(1, 120))
 
-    if LOGO_PATH:
-        logo = Image(LOGO_PATH, width=160, height=80)
+    if logo_path:
+        logo = Image(logo_path, width=160, height=80)
         logo.hAlign = "CENTER"
         elements.append(logo)
         elements.append(Spacer(1, 40))
@@ -123,7 +123,7 @@ def build_full_gri_report():
     elements.append(Spacer(1, 220))
     elements.append(
         Paragraph(
-            f"Generated on {datetime.today().strftime('%Y-%m-%d')}",
+            f"Generated on {generated_on}",
             ParagraphStyle(name="Footer", parent=styles["Normal"], alignment=TA_CENTER, fontSize=9),
         )
     )
@@ -212,19 +212,37 @@ def build_full_gri_report():
     return temp.name
 
 
+@st.cache_data(show_spinner=False, max_entries=16)
+def _report_pdf(year_df, year_number, logo_path, logo_mtime, generated_on):
+    # PDF bytes per year data, logo version and cover date: generating the
+    # same year's report again skips the reportlab build. The temp file
+    # is only a build target, so it is removed once read.
+    path = build_full_gri_report(year_df, year_number, logo_path, generated_on)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
 # =========================
 # ✅ UI CONTROLS
 # =========================
-if "pdf_path" not in st.session_state:
-    st.session_state.pdf_path = None
+if "pdf_bytes" not in st.session_state:
+    st.session_state.pdf_bytes = None
 
 if st.button("📄 Generate FULL GRI PDF"):
-    st.session_state.pdf_path = build_full_gri_report()
+    st.session_state.pdf_bytes = _report_pdf(
+        year_df,
+        year_number,
+        LOGO_PATH,
+        os.path.getmtime(LOGO_PATH) if LOGO_PATH else None,
+        datetime.today().strftime('%Y-%m-%d'),
+    )
     st.success("✅ Full GRI Report Generated Successfully!")
 
-if st.session_state.pdf_path:
-    with open(st.session_state.pdf_path, "rb") as f:
-        pdf_bytes = f.read()
+if st.session_state.pdf_bytes:
+    pdf_bytes = st.session_state.pdf_bytes
 
     st.download_button(
         "⬇ Download Full GRI PDF",
@@ -1,51 +1,29 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
 import numpy as np
+import re
 
-def detect_metric_column(df):
-    possible_cols = [
-        "Additional Metrics (Energy)",
-        "Additional Metrics",
-        "Metric",
-        "Indicator",
-        "KPI"
-    ]
-    for col in possible_cols:
-        if col in df.columns:
-            return col
-    return None
-
-def plot(fig, name):
-    st.plotly_chart(
-        fig,
-        width="stretch",
-        key=f"{name}_{id(fig)}"
-    )
+# Rows per page in the raw-data table
+RAW_PAGE_SIZE = 200
 
-def safe_plotly(fig, key_prefix):
+def plot(fig, name, stable_id):
     st.plotly_chart(
         fig,
         width="stretch",
-        key=f"{key_prefix}_{id(fig)}"
+        key=f"{name}_{stable_id}"
     )
 
-def safe_subtract(a, b):
-    if a is None or b is None:
-        return None
-    return a - b
 
 from src.company_data_loader import (
     list_company_files,
     load_company_file,
-    compute_kpis_by_category,
-    get_trend_data
+    compute_kpis_by_category
 )
-from src.company_pdf_exporter import build_company_pdf
 from src.email_sender import send_pdf_via_email
 
 from src.data_validation import normalize_numeric
-from src.indicator_status import indicator_status
+from src.indicator_status import indicator_status_batch
+from src.kpi_service import batch_linear_forecast
 from src.ai_insight import generate_ai_insight
 
 # =========================================
@@ -82,6 +60,26 @@ UNIT_MAP = {
     "intensity": "kg/BOE"
 }
 
+# Single compiled matcher over all unit keywords (lookahead so
+# overlapping keywords such as "wastewater" are all seen)
+UNIT_RE = re.compile("(?=(" + "|".join(map(re.escape, UNIT_MAP)) + "))")
+
+
+def kpi_unit(name):
+    # One scan for every keyword; UNIT_MAP order decides between hits
+    found = set(UNIT_RE.findall(name.lower()))
+    return next((u for k, u in UNIT_MAP.items() if k in found), "")
+
+# =========================================
+# ESG WEIGHTS
+# =========================================
+ESG_WEIGHTS = {
+    "energy": 0.25,
+    "water": 0.25,
+    "emission": 0.35,
+    "waste": 0.15
+}
+
 # =========================================
 # HELPERS
 # =========================================
@@ -109,57 +107,53 @@ def classify_esg(score):
         return "Risky"
 
 
-def calculate_esg_score(kpis):
-    weights = {
-        "energy": 0.25,
-        "water": 0.25,
-        "emission": 0.35,
-        "waste": 0.15
+@st.cache_data(show_spinner=False)
+def kpi_weight_map(kpi_names):
+    # {kpi: matching weights}, scanned once per KPI name set and shared
+    # by the current score, the contribution table and the future score
+    return {
+        k: tuple(w for key, w in ESG_WEIGHTS.items() if key in k.lower())
+        for k in kpi_names
     }
 
-    score, used = 0, 0
 
-    for k, v in kpis.items():
-        v = normalize_numeric(v)
-        if v is None:
-            continue
+def esg_breakdown(kpis):
+    """
+    ESG score, status and the per-KPI contribution table from one pass
+    over the KPIs (one normalize_numeric / weight lookup per KPI).
+    """
+    weight_map = kpi_weight_map(tuple(kpis))
+    pairs, rows = [], []
 
-        for key, w in weights.items():
-            if key in k.lower():
-                score += max(0, 100 - v) * w
-                used += w
-
-    if used == 0:
-        return 0, "N/A"
-
-    final = round(score / used, 2)
-    return final, classify_esg(final)
+    for kpi, value in kpis.items():
+        val = normalize_numeric(value)
+        if val is None or not weight_map[kpi]:
+            continue
 
+        pairs.append((sum(weight_map[kpi]), val))
+        for weight in weight_map[kpi]:
+            rows.append({
+                "KPI": kpi,
+                "Value": round(val, 2),
+                "Weight": weight,
+                "Contribution to ESG": round(max(0, 100 - val) * weight, 2)
+            })
 
-def calculate_future_esg_score(df, selected_category, kpis):
-    score, used = 0, 0
+    contrib_df = pd.DataFrame(rows)
+    if not pairs:
+        return 0, "N/A", contrib_df
 
-    weights = {
-        "energy": 0.25,
-        "water": 0.25,
-        "emission": 0.35,
-        "waste": 0.15
-    }
+    weights, values = np.array(pairs, dtype=np.float64).T
+    score = np.dot(np.maximum(0, 100 - values), weights)
 
-    for k, v in kpis.items():
-        v = normalize_numeric(v)
-        if v is None:
-            continue
+    final = round(float(score / weights.sum()), 2)
+    return final, classify_esg(final), contrib_df
 
-        for key, w in weights.items():
-            if key in k.lower():
-                score += max(0, 100 - v) * w
-                used += w
 
-    if used == 0:
-        return None
+@st.cache_data(show_spinner=False)
+def cached_esg_breakdown(kpi_items):
+    return esg_breakdown(dict(kpi_items))
 
-    return round(score / used, 2)
 
 # =========================================
 # GRI KNOWLEDGE BASE (STATIC)
@@ -207,71 +201,311 @@ GRI_KNOWLEDGE = {
     }
 }
 
-# =====================================================
-# 🔴 الإضافة 1: KPI Contribution (مطلوبة للكود)
-# =====================================================
-def calculate_kpi_contribution(kpis):
-    weights = {
-        "energy": 0.25,
-        "water": 0.25,
-        "emission": 0.35,
-        "waste": 0.15
-    }
+# Alias → entry ("302", "energy", "emissions", ...) for O(1) lookup
+GRI_INDEX = {
+    alias: info
+    for key, info in GRI_KNOWLEDGE.items()
+    for alias in (info["standard"].split()[1], key, f"{key}s")
+}
 
-    rows = []
-    for kpi, value in kpis.items():
-        val = normalize_numeric(value)
-        if val is None:
-            continue
 
-        for key, weight in weights.items():
-            if key in kpi.lower():
-                rows.append({
-                    "KPI": kpi,
-                    "Value": round(val, 2),
-                    "Weight": weight,
-                    "Contribution to ESG": round(max(0, 100 - val) * weight, 2)
-                })
-
-    return pd.DataFrame(rows)
-
-
-# =====================================================
-# 🔴 الإضافة 2: Future ESG Score (مطلوبة للكود)
-# =====================================================
-def calculate_future_esg_score(df, selected_category, kpis):
-    weights = {
-        "energy": 0.25,
-        "water": 0.25,
-        "emission": 0.35,
-        "waste": 0.15
-    }
+# =========================================
+# AI ASSISTANT (cached per normalized question)
+# =========================================
+@st.cache_data(show_spinner=False, max_entries=256)
+def ai_chat_response(q, company, esg_score, esg_status, top_kpis):
+    # ---- GRI QUESTIONS ----
+    if "gri" in q or "standard" in q:
+        info = GRI_INDEX.get(
+            next((t for t in re.findall(r"[a-z0-9]+", q) if t in GRI_INDEX), None)
+        )
+        if info:
+            return (
+                f"{info['standard']}\n\n"
+                f"{info['description']}\n\n"
+                f"Recommended actions:\n{info['recommendation']}"
+            )
+        return (
+            "GRI standards covered:\n"
+            "- GRI 302 (Energy)\n"
+            "- GRI 303 (Water)\n"
+            "- GRI 305 (Emissions)\n"
+            "- GRI 306 (Waste)"
+        )
 
-    score, used = 0, 0
+    # ---- CURRENT ESG ----
+    if "esg" in q:
+        if esg_score is None or esg_status == "N/A":
+            return "ESG score is currently unavailable due to missing data."
 
-    for kpi in kpis:
-        trend = get_trend_data(df, selected_category, kpi)
-        if not trend or len(trend) < 3:
-            continue
+        return f"Current ESG score for {company} is {esg_score} ({esg_status})."
+
+    # ---- KPI INSIGHT ----
+    if "kpi" in q or "risk" in q:
+        if not top_kpis:
+            return "No high-impact KPIs identified due to insufficient data."
+        return "Top ESG-impact KPIs:\n- " + "\n- ".join(top_kpis)
+
+    return (
+        "You can ask about ESG score, KPI risks, or GRI standards."
+    )
+
+
+# =========================================
+# TREND FIGURE (cached per metric series)
+# =========================================
+@st.cache_data(show_spinner=False)
+def build_trend_figure(metric, years, values, next_year, forecast_value):
+    import plotly.graph_objects as go
+
+    # ----------------------
+    # Prepare Data
+    # ----------------------
+    all_years = np.asarray(years, dtype=np.int32)
+    all_values = np.asarray(values, dtype=np.float64)
+
+    # ----------------------
+    # Create Figure
+    # ----------------------
+    fig = go.Figure()
+
+    fig.add_trace(
+        go.Scatter(
+            x=all_years,
+            y=all_values,
+            mode="lines+markers",
+            name="Historical Data"
+        )
+    )
+
+    # ----------------------
+    # Forecast (precomputed per category in _trends)
+    # ----------------------
+    mask = np.isfinite(all_values)
+    years = all_years[mask].astype(float)
+    values = all_values[mask]
+
+    if forecast_value is not None:
+
+        fig.add_trace(
+            go.Scatter(
+                x=[next_year],
+                y=[forecast_value],
+                mode="markers",
+                marker=dict(size=12, symbol="x"),
+                name="Forecast"
+            )
+        )
+
+        fig.add_trace(
+            go.Scatter(
+                x=[years.max(), next_year],
+                y=[values[-1], forecast_value],
+                mode="lines",
+                line=dict(dash="dash"),
+                name="Forecast Trend"
+            )
+        )
+
+    # ----------------------
+    # Safe Axis Handling
+    # ----------------------
+    y_max = values.max() if len(values) else 0
+
+    fig.update_layout(
+        title=f"{metric} Trend & Forecast",
+        xaxis_title="Year",
+        yaxis_title="Value",
+        yaxis_range=[0, y_max * 1.2] if y_max > 0 else None,
+        template="plotly_white"
+    )
+
+    return fig.to_dict()
+
+# =========================================
+# GAUGE FIGURES (cached as plain figure dicts)
+# =========================================
+@st.cache_data(show_spinner=False)
+def esg_gauge_figure(score, status):
+    import plotly.graph_objects as go
+
+    color = (
+        "green" if status == "Excellent"
+        else "orange" if status == "Moderate"
+        else "red"
+    )
 
-        chart_df = pd.DataFrame(trend, index=["Value"]).T
-        chart_df.index = chart_df.index.astype(int)
+    fig = go.Figure(
+        go.Indicator(
+            mode="gauge+number",
+            value=score,
+            number={"suffix": " / 100"},
+            title={"text": f"ESG Score — {status}"},
+            gauge={
+                "axis": {"range": [0, 100]},
+                "bar": {"color": color}
+            }
+        )
+    )
+    return fig.to_dict()
 
-        years = chart_df.index.values
-        values = chart_df["Value"].values
 
-        model = np.poly1d(np.polyfit(years, values, 1))
-        forecast_value = model(years.max() + 1)
+@st.cache_data(show_spinner=False)
+def kpi_gauges_figure(gauge_kpis):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
 
-        for key, weight in weights.items():
-            if key in kpi.lower():
-                score += max(0, 100 - forecast_value) * weight
-                used += weight
+    rows = (len(gauge_kpis) + 2) // 3
+    fig = make_subplots(
+        rows=rows,
+        cols=3,
+        specs=[[{"type": "indicator"}] * 3] * rows
+    )
 
-    if used == 0:
-        return None
+    for i, (kpi, val) in enumerate(gauge_kpis):
+        unit = kpi_unit(kpi)
+
+        kpi_status = classify_kpi(val)
+        color = "green" if kpi_status == "Excellent" else "orange" if kpi_status == "Moderate" else "red"
+        axis_max = max(100, val * 1.5)
+
+        # ✅ واضح وكبير
+        fig.add_trace(
+            go.Indicator(
+                mode="gauge+number",
+                value=val,
+                title={"text": f"<b>{kpi}</b><br><sub>Status: {kpi_status}</sub>"},
+                number={
+                    "suffix": f" {unit}",
+                    "font": {"size": 30}
+                },
+                gauge={
+                    "axis": {"range": [0, axis_max]},
+                    "bar": {"color": color}
+                }
+            ),
+            row=i // 3 + 1,
+            col=i % 3 + 1
+        )
 
-    return round(score / used, 2)
+    fig.update_layout(height=320 * rows)
+    return fig.to_dict()
+
+
+@st.cache_data(show_spinner=False)
+def status_heatmap_figure(heatmap_df):
+    # Indicator × company grid coloured client-side (no Styler HTML)
+    import plotly.graph_objects as go
+
+    fig = go.Figure(
+        go.Heatmap(
+            z=heatmap_df.to_numpy(dtype=float),
+            x=heatmap_df.columns.astype(str).tolist(),
+            y=heatmap_df.index.astype(str).tolist(),
+            zmin=0,
+            zmax=2,
+            colorscale="RdYlGn",
+            xgap=1,
+            ygap=1,
+            colorbar=dict(
+                tickvals=[0, 1, 2],
+                ticktext=["Not Reported", "Partial", "Reported"]
+            )
+        )
+    )
+    fig.update_layout(
+        height=max(400, 22 * len(heatmap_df)),
+        yaxis=dict(autorange="reversed"),
+        template="plotly_white"
+    )
+    return fig.to_dict()
+
+# =========================================
+# CACHED DATA ACCESS (survives reruns)
+# =========================================
+# Expire hourly so edited workbooks are picked up without a restart
+DATA_TTL = 3600
+
+
+@st.cache_data(show_spinner=False, ttl=DATA_TTL)
+def _load(company_file):
+    return load_company_file(company_file)
+
+
+@st.cache_data(show_spinner=False, ttl=DATA_TTL)
+def _kpis(company_file, category):
+    return compute_kpis_by_category(_load(company_file), category)
+
+
+@st.cache_data(show_spinner=False, ttl=DATA_TTL)
+def _schema(company_file):
+    d = _load(company_file)
+    metric_col = d.attrs["metric_col"]
+    year_cols = list(d.attrs["year_cols"])
+    years = np.array([int(y) for y in year_cols], dtype=np.int32)
+    return metric_col, year_cols, years
+
+
+@st.cache_data(show_spinner=False, ttl=DATA_TTL)
+def _trends(company_file, category):
+    # Every metric's yearly series of one category in a single pass
+    # (same metric column and first-row rule as get_trend_data), plus
+    # the next-year forecast of all series from one batched line fit
+    d = _load(company_file)
+    cat = d[d["Category"] == category]
+
+    metric_col = d.attrs["metric_col"]
+    if metric_col is None:
+        return {}
+
+    _, year_cols, years = _schema(company_file)
+    rows = cat.dropna(subset=[metric_col]).drop_duplicates(metric_col)
+    Y = rows[year_cols].to_numpy(dtype=np.float64)
+
+    next_years = np.where(np.isfinite(Y), years, -1).max(axis=1) + 1
+    forecasts = batch_linear_forecast(years, Y, next_years)
+
+    years = tuple(years.tolist())
+    return {
+        metric: (
+            years,
+            tuple(vals),
+            int(next_year) if np.isfinite(forecast) else None,
+            float(forecast) if np.isfinite(forecast) else None,
+        )
+        for metric, vals, next_year, forecast in zip(
+            rows[metric_col].tolist(), Y, next_years, forecasts
+        )
+    }
+
+
+@st.cache_data(show_spinner=False, ttl=DATA_TTL)
+def _company_pdf(company_file, category):
+    # PDF bytes per (company, category): re-pressing "Generate PDF"
+    # for unchanged inputs skips the reportlab/matplotlib build
+    from src.company_pdf_exporter import build_company_pdf
+
+    buffer = build_company_pdf(
+        company_file.replace(".xlsx", ""),
+        _load(company_file),
+        _kpis(company_file, category),
+        category
+    )
+    return buffer.getvalue()
+
+
+@st.cache_data(show_spinner=False, ttl=DATA_TTL)
+def _indicator_status(company_file):
+    # (status, coverage) arrays for every row of the workbook, computed
+    # once per file instead of on every comparison rerun
+    _, year_cols, _ = _schema(company_file)
+    return indicator_status_batch(_load(company_file)[year_cols])
+
+
+@st.cache_data(show_spinner=False, ttl=DATA_TTL)
+def _categories(company_file):
+    # Category is categorical after loading → read the dictionary, no scan
+    return sorted(_load(company_file)["Category"].cat.categories)
 
 # =========================================
 # COMPANY SELECTION
@@ -283,70 +517,76 @@ if not files:
 
 company_file = st.selectbox("📂 Select Company", files)
 company_name = company_file.replace(".xlsx", "")
-df = load_company_file(company_file)
+df = _load(company_file)
 
-categories = sorted(df["Category"].dropna().unique())
+categories = _categories(company_file)
 selected_category = st.selectbox("📊 Select Category", categories)
 cat_df = df[df["Category"] == selected_category]
 
-year_cols = sorted([c for c in df.columns if str(c).isdigit()])
-kpis = compute_kpis_by_category(df, selected_category)
-metric_col = next((c for c in cat_df.columns if "metric" in c.lower()), None)
+metric_col, year_cols, YEARS = _schema(company_file)
+kpis = _kpis(company_file, selected_category)
 
-# =========================================
-# TABS (كما هي)
-# =========================================
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-    "📊 Data & KPIs",
-    "🌍 ESG Score",
-    "📈 Trends & Forecast",
-    "📄 Reports",
-    "🏭 Company Comparison",
-    "🤖 Sustainability AI Assistant"
-])
+# Metric → row index, built once (first occurrence wins)
+cat_by_metric = (
+    cat_df.drop_duplicates(metric_col).set_index(metric_col, drop=False)
+    if metric_col is not None else cat_df
+)
 
-# ---------- باقي الكود كما هو ----------
-# (لم يتم تغيير أي Tab أو منطق)
+# Value matrix (rows follow cat_by_metric, columns follow YEARS)
+VALUES = cat_by_metric[year_cols].to_numpy(dtype=np.float64)
 
+esg_score, esg_status, contrib_df = cached_esg_breakdown(tuple(kpis.items()))
 
+# =========================================
+# VIEWS (only the selected one is executed)
+# Views with their own widgets are fragments: paging the table, picking
+# comparison companies or asking the assistant reruns only that view
 # =========================================
 # TAB 1 — DATA & KPIs
 # =========================================
-with tab1:
+@st.fragment
+def render_data_kpis():
     st.subheader("📑 Raw Data")
-    st.dataframe(cat_df, use_container_width=True)
+
+    # Ship at most one page of rows to the browser per rerun
+    n_pages = max(1, -(-len(cat_df) // RAW_PAGE_SIZE))
+    page = 0
+    if n_pages > 1:
+        page = st.number_input("Page", 1, n_pages, 1, key="raw_page") - 1
+
+    st.dataframe(
+        cat_df.iloc[page * RAW_PAGE_SIZE:(page + 1) * RAW_PAGE_SIZE],
+        use_container_width=True
+    )
 
     st.subheader("📌 KPI Smart Cards (YOY)")
     if year_cols:
         cols = st.columns(len(kpis))
 
         for col, (k, _) in zip(cols, kpis.items()):
-            row = cat_df[cat_df[metric_col] == k]
-            if row.empty:
+            if k not in cat_by_metric.index:
                 continue
 
-            # 🔹 جمع القيم الرقمية فقط
-            values = []
-            for y in sorted(year_cols, reverse=True):
-                v = normalize_numeric(row.iloc[0][y])
-                if isinstance(v, (int, float)):
-                    values.append((y, v))
+            # 🔹 القيم الرقمية فقط (year_cols مرتبة تصاعديًا)
+            row_vals = VALUES[cat_by_metric.index.get_loc(k)]
+            valid_idx = np.flatnonzero(~np.isnan(row_vals))
 
-            if not values:
+            if valid_idx.size == 0:
                 col.metric(label=k, value="N/A")
                 continue
 
-            latest_year, latest_val = values[0]
+            latest_year = YEARS[valid_idx[-1]]
+            latest_val = row_vals[valid_idx[-1]]
 
             # 🔹 حالة سنة واحدة فقط (NO DELTA AT ALL)
-            if len(values) < 2:
+            if valid_idx.size < 2:
                 col.metric(
                     label=f"{k} ({latest_year})",
                     value=f"{latest_val:,.2f}"
                 )
                 continue
 
-            prev_val = values[1][1]
+            prev_val = row_vals[valid_idx[-2]]
             delta_val = latest_val - prev_val
 
             # 🔥 استدعاء نظيف بدون أي None
@@ -359,100 +599,17 @@ with tab1:
 # =========================================
 # TAB 2 — ESG SCORE + GAUGES
 # =========================================
-# =========================================
-# TAB 2 — ESG SCORE + GAUGES
-# =========================================
-with tab2:
-    st.subheader("🌍 Overall ESG Score")
-
-    # =========================
-    # Current ESG Score Gauge
-    # =========================
-    score, status = calculate_esg_score(kpis)
-
-    if status == "N/A" or score == 0:
-        st.warning("ESG Score cannot be calculated due to missing or unclassified KPI data.")
-    else:
-        color = "green" if status == "Excellent" else "orange" if status == "Moderate" else "red"
-
-        fig = go.Figure(go.Indicator(
-            mode="gauge+number",
-            value=score,
-            number={"suffix": " / 100"},
-            title={"text": f"ESG Score — {status}"},
-            gauge={"axis": {"range": [0, 100]}, "bar": {"color": color}}
-        ))
-        plot(fig, "trend")
-
-
-    # =========================
-    # ESG Calculation Methodology
-    # =========================
-    with st.expander("📘 How is the ESG Score Calculated?"):
-        st.markdown("""
-### ESG Score Calculation Methodology
-
-The ESG score is calculated using a weighted, risk-oriented approach based on environmental KPIs.
-
-**Step 1 – KPI Normalization**  
-Each KPI value is transformed into a performance score using:
-
-\[
-Adjusted\ KPI\ Score = 100 - KPI\ Value
-\]
-
-**Step 2 – Category Weighting**
-- Energy: 25%
-- Water: 25%
-- Emissions: 35%
-- Waste: 15%
-
-**Step 3 – Weighted Aggregation**
-
-\[
-ESG\ Score = \frac{\sum (Adjusted\ KPI \times Weight)}{\sum Weights}
-\]
-
-**Step 4 – Risk Classification**
-- ESG ≥ 70 → Excellent (Low Risk)
-- ESG 40–69 → Moderate (Medium Risk)
-- ESG < 40 → Risky (High Risk)
-        """)
-
-# =========================================
-# TAB 2 — ESG SCORE + GAUGES
-# =========================================
-with tab2:
+def render_esg_score():
     st.subheader("🌍 Overall ESG Score")
 
     # =========================
     # Overall ESG Score
     # =========================
-    score, status = calculate_esg_score(kpis)
-
-    if score is None or score == 0 or status == "N/A":
+    if esg_score is None or esg_score == 0 or esg_status == "N/A":
         st.warning("⚠️ ESG Score cannot be calculated due to missing KPI data.")
     else:
-        color = (
-            "green" if status == "Excellent"
-            else "orange" if status == "Moderate"
-            else "red"
-        )
-
-        fig = go.Figure(
-            go.Indicator(
-                mode="gauge+number",
-                value=float(score),
-                number={"suffix": " / 100"},
-                title={"text": f"ESG Score — {status}"},
-                gauge={
-                    "axis": {"range": [0, 100]},
-                    "bar": {"color": color}
-                }
-            )
-        )
-
-        plot(fig, "trend")
+        fig = esg_gauge_figure(float(esg_score), esg_status)
+        plot(fig, "esg_score", hash((company_file, selected_category)))
 
 
     # =========================
@@ -478,119 +635,38 @@ with tab2:
 - < 40 → Risky
         """)
 
- # =========================
-# Individual KPI Gauges (CLEAR TITLES + UNITS)
-# =========================
-st.subheader("📌 Individual KPI Performance")
-cols = st.columns(3)
-
-for i, (kpi, value) in enumerate(kpis.items()):
-    val = normalize_numeric(value)
-    if val is None or not np.isfinite(val):
-        continue
-
-    # -------------------------
-    # Detect unit based on KPI name
-    # -------------------------
-    unit = ""
-    for key, u in UNIT_MAP.items():
-        if key in kpi.lower():
-            unit = u
-            break
-
-    kpi_status = classify_kpi(val)
-    color = "green" if kpi_status == "Excellent" else "orange" if kpi_status == "Moderate" else "red"
-    axis_max = max(100, val * 1.5)
-
-    with cols[i % 3]:
-        # ✅ واضح وكبير
-        st.markdown(
-            f"### {kpi}  \n"
-            f"**Status:** `{kpi_status}`"
-        )
-
-        fig = go.Figure(go.Indicator(
-            mode="gauge+number",
-            value=val,
-            number={
-                "suffix": f" {unit}",
-                "font": {"size": 30}
-            },
-            gauge={
-                "axis": {"range": [0, axis_max]},
-                "bar": {"color": color}
-            }
-        ))
+    # =========================
+    # Individual KPI Gauges (CLEAR TITLES + UNITS)
+    # =========================
+    st.subheader("📌 Individual KPI Performance")
 
-        st.plotly_chart(fig, use_container_width=True)
+    gauge_kpis = []
+    for kpi, value in kpis.items():
+        val = normalize_numeric(value)
+        if val is not None and np.isfinite(val):
+            gauge_kpis.append((kpi, val))
 
+    if gauge_kpis:
+        fig = kpi_gauges_figure(tuple(gauge_kpis))
+        plot(fig, "kpi_gauges", hash((company_file, selected_category)))
 
 
 # =========================================
 # TAB 3 — KPI Trends & Forecast (FINAL FINAL)
 # =========================================
-with tab3:
+def render_trends():
     st.subheader("📈 KPI Trends & Forecast")
 
-    for i, metric in enumerate(kpis):
-        trend = get_trend_data(df, selected_category, metric)
-        if not trend:
-            continue
-
-        # ----------------------
-        # Prepare Data
-        # ----------------------
-        chart_df = pd.DataFrame(trend, index=["Value"]).T
-        chart_df.index = chart_df.index.astype(int)
-        chart_df["Value"] = pd.to_numeric(chart_df["Value"], errors="coerce")
-
-        # ----------------------
-        # Create Figure
-        # ----------------------
-        fig = go.Figure()
+    trends = _trends(company_file, selected_category)
 
-        fig.add_trace(
-            go.Scatter(
-                x=chart_df.index,
-                y=chart_df["Value"],
-                mode="lines+markers",
-                name="Historical Data"
-            )
-        )
-
-        # ----------------------
-        # Forecasting (SAFE)
-        # ----------------------
-        clean_df = chart_df.dropna(subset=["Value"])
-
-        if len(clean_df) >= 2:
-            years = clean_df.index.values.astype(float)
-            values = clean_df["Value"].values.astype(float)
-
-            model = np.poly1d(np.polyfit(years, values, 1))
-            next_year = int(years.max() + 1)
-            forecast_value = float(model(next_year))
-
-            fig.add_trace(
-                go.Scatter(
-                    x=[next_year],
-                    y=[forecast_value],
-                    mode="markers",
-                    marker=dict(size=12, symbol="x"),
-                    name="Forecast"
-                )
-            )
+    for metric in kpis:
+        if metric not in trends:
+            continue
 
-            fig.add_trace(
-                go.Scatter(
-                    x=[years.max(), next_year],
-                    y=[values[-1], forecast_value],
-                    mode="lines",
-                    line=dict(dash="dash"),
-                    name="Forecast Trend"
-                )
-            )
+        years, values, next_year, forecast_value = trends[metric]
+        fig = build_trend_figure(metric, years, values, next_year, forecast_value)
 
+        if forecast_value is not None:
             # ✅ markdown بدل info
             st.markdown(
                 f"🔮 **{metric}** — Forecast for **{next_year}**: `{forecast_value:.2f}`"
@@ -602,49 +678,40 @@ with tab3:
             )
 
         # ----------------------
-        # Safe Axis Handling
-        # ----------------------
-        y_values = clean_df["Value"]
-
-        fig.update_layout(
-            title=f"{metric} Trend & Forecast",
-            xaxis_title="Year",
-            yaxis_title="Value",
-            yaxis_range=[
-                0,
-                y_values.max() * 1.2
-            ] if not y_values.empty and y_values.max() > 0 else None,
-            template="plotly_white"
-        )
-
-        # ----------------------
-        # Plot (WITH UNIQUE KEY)
+        # Plot (STABLE KEY)
         # ----------------------
-        plot(fig, f"trend_{selected_category}_{metric}")
+        plot(fig, "trend", hash((company_file, selected_category, metric)))
 
 
 # =========================================
 # TAB 4 — REPORTS & EMAIL
 # =========================================
-with tab4:
+@st.fragment
+def render_reports():
     if st.button("✅ Generate PDF"):
-        pdf = build_company_pdf(company_name, df, kpis, selected_category)
-        st.session_state.company_pdf = pdf
+        with st.spinner("⏳ Building PDF…"):
+            st.session_state.company_pdf = _company_pdf(company_file, selected_category)
         st.success("PDF Generated")
 
     if "company_pdf" in st.session_state:
         st.download_button(
             "⬇ Download PDF",
-            st.session_state.company_pdf.getvalue(),
+            st.session_state.company_pdf,
             f"{company_name}_GRI_Report.pdf",
             "application/pdf"
         )
 
+    email_fragment(company_name)
+
+
+# Typing the address / sending reruns only this block, not the dashboard
+@st.fragment
+def email_fragment(company_name):
     email = st.text_input("📧 Receiver Email")
     if st.button("📨 Send Email"):
         send_pdf_via_email(
             email,
-            st.session_state.company_pdf.getvalue(),
+            st.session_state.company_pdf,
             f"{company_name}_GRI_Report.pdf",
             "GRI Report"
         )
@@ -653,7 +720,8 @@ with tab4:
 # =========================================
 # TAB 5 — COMPANY COMPARISON + AI + HEATMAP
 # =========================================
-with tab5:
+@st.fragment
+def render_comparison():
     st.subheader("🏭 Company Comparison")
 
     compare_files = st.multiselect(
@@ -663,29 +731,46 @@ with tab5:
     )
 
     if len(compare_files) >= 2:
-        rows = []
+        rows, heatmap, analysis_by_company = [], {}, {}
 
+        # One pass per company feeds the table, the AI insights and the heatmap
         for file in compare_files:
-            comp_df = load_company_file(file)
+            comp_df = _load(file)
             comp_name = file.replace(".xlsx", "")
 
-            metric_col_c = detect_metric_column(comp_df)
+            metric_col_c, _, _ = _schema(file)
             if metric_col_c is None:
                 continue
 
-            year_cols_c = sorted([c for c in comp_df.columns if str(c).isdigit()])
+            statuses, coverages = _indicator_status(file)
+
+            # Heatmap code straight from coverage:
+            # Reported → 2, Partial → 1, Not Reported → 0
+            # (last row wins for a repeated indicator, as before)
+            codes = (coverages > 0).astype(int) + (coverages == 100)
+            heatmap[comp_name] = (
+                pd.Series(codes, index=comp_df[metric_col_c].to_numpy())
+                .groupby(level=0, sort=False, dropna=False)
+                .last()
+            )
 
-            for _, row in comp_df.iterrows():
-                status, coverage = indicator_status(row[year_cols_c])
-                rows.append({
-                    "Company": comp_name,
-                    "Indicator": row[metric_col_c],
-                    "Status": status,
-                    "Coverage %": coverage
-                })
+            indicators = comp_df[metric_col_c].to_numpy()
+            rows.append(pd.DataFrame({
+                "Company": comp_name,
+                "Indicator": indicators,
+                "Status": statuses,
+                "Coverage %": coverages
+            }))
+
+            analysis_by_company[file] = [
+                {"indicator": indicator, "status": status, "coverage": coverage}
+                for indicator, status, coverage in zip(
+                    indicators.tolist(), statuses.tolist(), coverages.tolist()
+                )
+            ]
 
         st.dataframe(
-            pd.DataFrame(rows),
+            pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(),
             width="stretch"
         )
 
@@ -695,24 +780,11 @@ with tab5:
         st.subheader("🤖 AI Insights")
 
         selected_ai_company = st.selectbox("Select company", compare_files)
-        ai_df = load_company_file(selected_ai_company)
-
-        metric_col_ai = detect_metric_column(ai_df)
-        if metric_col_ai is not None:
-            year_cols_ai = sorted([c for c in ai_df.columns if str(c).isdigit()])
-            analysis = []
-
-            for _, row in ai_df.iterrows():
-                status, coverage = indicator_status(row[year_cols_ai])
-                analysis.append({
-                    "indicator": row[metric_col_ai],
-                    "status": status,
-                    "coverage": coverage
-                })
 
+        if selected_ai_company in analysis_by_company:
             for insight in generate_ai_insight(
                 selected_ai_company.replace(".xlsx", ""),
-                analysis
+                analysis_by_company[selected_ai_company]
             ):
                 st.markdown(f"🔹 {insight}")
 
@@ -721,29 +793,12 @@ with tab5:
         # =========================
         st.subheader("🔥 GRI Status Heatmap")
 
-        status_map = {"Reported": 2, "Partial": 1, "Not Reported": 0}
-        heatmap = {}
-
-        for file in compare_files:
-            comp_df = load_company_file(file)
-            comp_name = file.replace(".xlsx", "")
-
-            metric_col_h = detect_metric_column(comp_df)
-            if metric_col_h is None:
-                continue
-
-            year_cols_h = sorted([c for c in comp_df.columns if str(c).isdigit()])
-            heatmap[comp_name] = {}
-
-            for _, row in comp_df.iterrows():
-                status, _ = indicator_status(row[year_cols_h])
-                heatmap[comp_name][row[metric_col_h]] = status_map.get(status, 0)
-
         if heatmap:
-            heatmap_df = pd.DataFrame.from_dict(heatmap, orient="index").T
-            st.dataframe(
-                heatmap_df.style.background_gradient(cmap="RdYlGn"),
-                width="stretch"
+            heatmap_df = pd.concat(heatmap, axis=1)
+            plot(
+                status_heatmap_figure(heatmap_df),
+                "status_heatmap",
+                hash(tuple(compare_files))
             )
 
     else:
@@ -752,69 +807,19 @@ with tab5:
 # =========================================
 # TAB 6 — SUSTAINABILITY AI ASSISTANT
 # =========================================
-with tab6:
+@st.fragment
+def render_assistant():
     st.subheader("🤖 Sustainability AI Assistant")
     st.write("Ask questions about company ESG data or GRI standards.")
 
     # ---------- Context ----------
-    esg_score, esg_status = calculate_esg_score(kpis)
-    contrib_df = calculate_kpi_contribution(kpis)
-
-    context = {
-        "company": company_name,
-        "esg_score": esg_score,
-        "esg_status": esg_status,
-        "top_kpis": (
+    top_kpis = (
+        tuple(
             contrib_df.sort_values("Contribution to ESG", ascending=False)
             .head(3)["KPI"]
-            .tolist()
-            if not contrib_df.empty else []
-        )
-    }
-
-    # ---------- AI Logic ----------
-    def ai_chat_response(question, ctx):
-        q = question.lower()
-
-        # ---- GRI QUESTIONS ----
-        if "gri" in q or "standard" in q:
-            for key, info in GRI_KNOWLEDGE.items():
-                if key in q:
-                    return (
-                        f"{info['standard']}\n\n"
-                        f"{info['description']}\n\n"
-                        f"Recommended actions:\n{info['recommendation']}"
-                    )
-            return (
-                "GRI standards covered:\n"
-                "- GRI 302 (Energy)\n"
-                "- GRI 303 (Water)\n"
-                "- GRI 305 (Emissions)\n"
-                "- GRI 306 (Waste)"
-            )
-
-        # ---- CURRENT ESG ----
-        if "esg" in q:
-            if ctx["esg_score"] is None or ctx["esg_status"] == "N/A":
-                return "ESG score is currently unavailable due to missing data."
-
-            return (
-                f"Current ESG score for {ctx['company']} is "
-                f"{ctx['esg_score']} ({ctx['esg_status']})."
-            )
-
-        # ---- KPI INSIGHT ----
-        if "kpi" in q or "risk" in q:
-            if not ctx["top_kpis"]:
-                return "No high-impact KPIs identified due to insufficient data."
-            return (
-                "Top ESG-impact KPIs:\n- "
-                + "\n- ".join(ctx["top_kpis"])
-            )
-
-        return (
-            "You can ask about ESG score, KPI risks, or GRI standards."
         )
+        if not contrib_df.empty else ()
+    )
 
     # ---------- INPUT ----------
     user_question = st.text_input(
@@ -823,5 +828,23 @@ with tab6:
     )
 
     if user_question:
-        answer = ai_chat_response(user_question, context)
+        answer = ai_chat_response(
+            user_question.strip().lower(), company_name, esg_score, esg_status, top_kpis
+        )
         st.chat_message("assistant").write(answer)
+
+
+# =========================================
+# VIEW DISPATCH
+# =========================================
+VIEWS = {
+    "📊 Data & KPIs": render_data_kpis,
+    "🌍 ESG Score": render_esg_score,
+    "📈 Trends & Forecast": render_trends,
+    "📄 Reports": render_reports,
+    "🏭 Company Comparison": render_comparison,
+    "🤖 Sustainability AI Assistant": render_assistant,
+}
+
+active_view = st.radio("View", list(VIEWS), horizontal=True, key="active_tab")
+VIEWS[active_view]()
@@ -1,8 +1,10 @@
 # scripts/etl.py
 import os
 import glob
+from multiprocessing import Pool
+
+import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
 
 DATA_DIR = "data"
 ETL_OUT = "output/etl"
@@ -14,23 +16,18 @@ os.makedirs(ETL_OUT, exist_ok=True)
 # -------------------------------
 def detect_anomalies(df, col):
     df[col] = pd.to_numeric(df[col], errors='coerce')
-    values = df[col].fillna(df[col].mean()).values.reshape(-1, 1)
-
-    scaler = StandardScaler()
-    z_scores = scaler.fit_transform(values)
-    df["z_score"] = z_scores
-
-    flags = []
-    for z in z_scores:
-        if z > 2:
-            flags.append("High Anomaly")
-        elif z < -2:
-            flags.append("Low Anomaly")
-        elif abs(z) > 1.5:
-            flags.append("Warning")
-        else:
-            flags.append("Normal")
-    df["anomaly_flag"] = flags
+    values = df[col].fillna(df[col].mean()).to_numpy(dtype=float)
+
+    # Same scaling as StandardScaler (population std, constant column → 0)
+    std = values.std()
+    z = (values - values.mean()) / (std if std > 0 else 1.0)
+    df["z_score"] = z
+
+    df["anomaly_flag"] = np.select(
+        [z > 2, z < -2, np.abs(z) > 1.5],
+        ["High Anomaly", "Low Anomaly", "Warning"],
+        "Normal"
+    )
 
     return df
 
@@ -38,45 +35,50 @@ def detect_anomalies(df, col):
 # -------------------------------
 #              ETL
 # -------------------------------
-def run_etl():
-    records = []
+def _process_file(path):
+    try:
+        print(f"➡️ Processing: {path}")
 
-    print("🔄 Starting ETL...")
-    print(f"📂 Reading data from: {DATA_DIR}")
+        if path.endswith(".csv"):
+            df = pd.read_csv(path)
+        else:
+            df = pd.read_excel(path)
 
-    for path in glob.glob(f"{DATA_DIR}/*"):
-        try:
-            print(f"➡️ Processing: {path}")
+        df = df.dropna(how="all", axis=1)
 
-            if path.endswith(".csv"):
-                df = pd.read_csv(path)
-            else:
-                df = pd.read_excel(path)
+        value_cols = [
+            c for c in df.columns
+            if c.lower() in [
+                "value", "energy_kwh", "co2", "co2_tons",
+                "water_m3", "waste_ton", "monthly_value"
+            ]
+        ]
+
+        if value_cols:
+            print(f"📊 Detecting anomalies for: {value_cols[0]}")
+            df = detect_anomalies(df, value_cols[0])
+        else:
+            print("❗ No KPI column found (value, energy_kwh, co2, ...)")
 
-            df = df.dropna(how="all", axis=1)
+        out_name = os.path.join(ETL_OUT, f"{os.path.basename(path)}.clean.csv")
+        df.to_csv(out_name, index=False)
 
-            value_cols = [
-                c for c in df.columns
-                if c.lower() in [
-                    "value", "energy_kwh", "co2", "co2_tons",
-                    "water_m3", "waste_ton", "monthly_value"
-                ]
-            ]
+        print(f"✅ Saved cleaned file: {out_name}")
+        return out_name
 
-            if value_cols:
-                print(f"📊 Detecting anomalies for: {value_cols[0]}")
-                df = detect_anomalies(df, value_cols[0])
-            else:
-                print("❗ No KPI column found (value, energy_kwh, co2, ...)")
+    except Exception as e:
+        print(f"❌ Failed {path}: {e}")
+        return None
 
-            out_name = os.path.join(ETL_OUT, f"{os.path.basename(path)}.clean.csv")
-            df.to_csv(out_name, index=False)
-            records.append(out_name)
 
-            print(f"✅ Saved cleaned file: {out_name}")
+def run_etl():
+    print("🔄 Starting ETL...")
+    print(f"📂 Reading data from: {DATA_DIR}")
 
-        except Exception as e:
-            print(f"❌ Failed {path}: {e}")
+    # Files are independent → read / detect / write them in parallel
+    paths = glob.glob(f"{DATA_DIR}/*")
+    with Pool(min(len(paths), os.cpu_count() or 1) or 1) as pool:
+        records = [r for r in pool.imap(_process_file, paths) if r]
 
     print("🎉 ETL Completed!")
     print(f"📁 Output written to: {ETL_OUT}")
@@ -1,5 +1,5 @@
 import re
-from typing import Literal, Dict, Any, List
+from typing import Literal, Dict, Any, Iterable, List
 
 import pandas as pd
 
@@ -7,11 +7,27 @@ from .config import INDICATORS
 from .data_loader import load_indicator
 from .kpi_service import compute_yearly_totals, forecast_next_year
 from .reporting import build_indicator_narrative
-from .llm_engine import generate_sustainability_answer
+from .llm_engine import (
+    MAX_LLM_BATCH,
+    generate_sustainability_answer,
+    generate_sustainability_answer_batch,
+)
 
 
 IndicatorKey = Literal["energy", "water", "emissions", "waste"]
 
+_YEAR_RE = re.compile(r"\b(20[0-9]{2})\b")
+
+# Plain substring keywords per indicator, listed in detection priority
+# (lookahead so overlapping keywords such as "30302" are all seen)
+_INDICATOR_RE = re.compile(
+    r"(?=(?P<energy>energy|electricity|power|302)"
+    r"|(?P<water>water|303)"
+    r"|(?P<emissions>emission|co2|carbon|ghg|305)"
+    r"|(?P<waste>waste|306))",
+    re.IGNORECASE,
+)
+
 
 class SustainabilityAgent:
     """
@@ -34,30 +50,31 @@ class SustainabilityAgent:
             self._cache[indicator_key] = load_indicator(indicator_key)
         return self._cache[indicator_key]
 
+    def prewarm(self, keys: Iterable[str] = INDICATORS) -> None:
+        """
+        Load every missing indicator up front, so later questions never
+        wait on a cold parse. Sequential on purpose: the indicators share
+        the yearly workbooks, so the first load parses each file once and
+        the rest are served from the data_loader cache.
+        """
+        for key in keys:
+            self._get_data(key)
+
     # --------------------------------------------------------------
     #                  SMART INDICATOR DETECTION
     # --------------------------------------------------------------
     @staticmethod
     def _detect_indicator(query: str):
-        q = query.lower()
-
-        if any(x in q for x in ["energy", "electricity", "power", "302"]):
-            return "energy"
-        if any(x in q for x in ["water", "303"]):
-            return "water"
-        if any(x in q for x in ["emission", "co2", "carbon", "ghg", "305"]):
-            return "emissions"
-        if any(x in q for x in ["waste", "306"]):
-            return "waste"
-
-        return None
+        # One scan for every keyword; priority order decides between hits
+        found = {m.lastgroup for m in _INDICATOR_RE.finditer(query)}
+        return next((k for k in _INDICATOR_RE.groupindex if k in found), None)
 
     # --------------------------------------------------------------
     #                         YEAR DETECTION
     # --------------------------------------------------------------
     @staticmethod
     def _detect_years(query: str, df: pd.DataFrame) -> List[int]:
-        years_found = [int(y) for y in re.findall(r"\b(20[0-9]{2})\b", query)]
+        years_found = [int(y) for y in _YEAR_RE.findall(query)]
         if years_found:
             return years_found
 
@@ -67,23 +84,81 @@ class SustainabilityAgent:
     #                         MAIN LOGIC
     # --------------------------------------------------------------
     def answer(self, query: str) -> str:
+        return self._answer_with_context(query, self._build_context(query))
 
-        indicator_key = self._detect_indicator(query)
+    def _answer_with_context(self, query: str, kpi_context: Dict[str, Any]) -> str:
 
         # GENERAL QUESTION (NO INDICATOR)
+        if kpi_context.get("general_question"):
+            return generate_sustainability_answer(query, kpi_context)
+
+        # --------------------------------------------------------------
+        #                        LLM ANSWER
+        # --------------------------------------------------------------
+        try:
+            return generate_sustainability_answer(query, kpi_context)
+
+        except Exception as exc:
+            return self._fallback_answer(kpi_context, exc)
+
+    def answer_many(self, queries: List[str]) -> List[str]:
+        """
+        Answer several questions with one LLM round-trip per batch of
+        MAX_LLM_BATCH. A batch whose call fails (or whose reply cannot be
+        split back into one answer per question) is answered one by one
+        from the contexts already built. A question that still fails gets
+        an "[Error] ..." answer instead of aborting the others.
+        """
+        answers: List[str] = [""] * len(queries)
+        pending = []  # (position, query, context) still to send to the LLM
+
+        for i, query in enumerate(queries):
+            try:
+                pending.append((i, query, self._build_context(query)))
+            except Exception as exc:
+                answers[i] = f"[Error] {exc}"
+
+        for start in range(0, len(pending), MAX_LLM_BATCH):
+            batch = pending[start:start + MAX_LLM_BATCH]
+
+            try:
+                replies = generate_sustainability_answer_batch(
+                    [q for _, q, _ in batch], [c for _, _, c in batch]
+                )
+            except Exception:
+                replies = [self._answer_or_error(q, c) for _, q, c in batch]
+
+            for (i, _, _), reply in zip(batch, replies):
+                answers[i] = reply
+
+        return answers
+
+    def _answer_or_error(self, query: str, kpi_context: Dict[str, Any]) -> str:
+        try:
+            return self._answer_with_context(query, kpi_context)
+        except Exception as exc:
+            return f"[Error] {exc}"
+
+    # --------------------------------------------------------------
+    #                        KPI PACKAGING
+    # --------------------------------------------------------------
+    def _build_context(self, query: str) -> Dict[str, Any]:
+
+        indicator_key = self._detect_indicator(query)
+
         if indicator_key is None:
-            return generate_sustainability_answer(
-                query,
-                {"general_question": True}
-            )
+            return {"general_question": True}
 
         meta = INDICATORS[indicator_key]
         df = self._get_data(indicator_key)
         yearly = compute_yearly_totals(df)
 
+        # Year-indexed totals: one index build, O(1) row access per year
+        by_year = yearly.set_index("Year")
+
         # YEARS
         years_requested = self._detect_years(query, df)
-        available_years = yearly["Year"].tolist()
+        available_years = by_year.index.tolist()
 
         years_valid = [y for y in years_requested if y in available_years]
         if not years_valid:
@@ -97,15 +172,12 @@ class SustainabilityAgent:
         except Exception:
             next_year, prediction = None, None
 
-        # --------------------------------------------------------------
-        #                        KPI PACKAGING
-        # --------------------------------------------------------------
-        unit = df["Unit"].iloc[0]
+        unit = df["Unit"].iat[0]
         kpi_records = []
         narratives = {}
 
         for year in years_valid:
-            row = yearly[yearly["Year"] == year].iloc[0]
+            row = by_year.loc[year]
 
             kpi_records.append({
                 "year": int(year),
@@ -122,7 +194,7 @@ class SustainabilityAgent:
         # --------------------------------------------------------------
         #                        LLM CONTEXT
         # --------------------------------------------------------------
-        kpi_context = {
+        return {
             "indicator_key": indicator_key,
             "indicator_name": meta.kpi_name,
             "gri_code": meta.gri_code,
@@ -136,33 +208,30 @@ class SustainabilityAgent:
             }
         }
 
-        # --------------------------------------------------------------
-        #                        LLM ANSWER
-        # --------------------------------------------------------------
-        try:
-            return generate_sustainability_answer(query, kpi_context)
-
-        except Exception as exc:
-            # ------------------- FALLBACK -----------------------
-            fb = []
+    # ------------------- FALLBACK -----------------------
+    @staticmethod
+    def _fallback_answer(kpi_context: Dict[str, Any], exc: Exception) -> str:
+        unit = kpi_context["unit"]
+        forecast = kpi_context["forecast"]
+        fb = []
 
-            fb.append(f"Indicator: {meta.kpi_name} ({meta.gri_code})")
-            fb.append(f"Unit: {unit}\n")
+        fb.append(f"Indicator: {kpi_context['indicator_name']} ({kpi_context['gri_code']})")
+        fb.append(f"Unit: {unit}\n")
 
-            for rec in kpi_records:
-                abs_change = "n/a" if rec["change_abs"] is None else f"{rec['change_abs']:,.2f} {unit}"
-                pct_change = "n/a" if rec["change_pct"] is None else f"{rec['change_pct']:.2f}%"
+        for rec in kpi_context["kpis"]:
+            abs_change = "n/a" if rec["change_abs"] is None else f"{rec['change_abs']:,.2f} {unit}"
+            pct_change = "n/a" if rec["change_pct"] is None else f"{rec['change_pct']:.2f}%"
 
-                fb.append(
-                    f"Year {rec['year']}: {rec['total_value']:,.2f} {unit} "
-                    f"(change: {abs_change}, {pct_change})"
-                )
-                fb.append(narratives[rec["year"]])
-                fb.append("")
+            fb.append(
+                f"Year {rec['year']}: {rec['total_value']:,.2f} {unit} "
+                f"(change: {abs_change}, {pct_change})"
+            )
+            fb.append(kpi_context["base_narratives"][rec["year"]])
+            fb.append("")
 
-            if next_year and prediction:
-                fb.append(f"Forecast for {next_year}: {prediction:,.2f} {unit}")
+        if forecast["next_year"] and forecast["predicted_value"]:
+            fb.append(f"Forecast for {forecast['next_year']}: {forecast['predicted_value']:,.2f} {unit}")
 
-            fb.append(f"\n[LLM Error: {exc}]")
+        fb.append(f"\n[LLM Error: {exc}]")
 
-            return "\n".join(fb)
+        return "\n".join(fb)
@@ -1,3 +1,6 @@
+from collections import Counter
+
+
 def generate_ai_insight(company_name, indicator_analysis):
     """
     indicator_analysis: list of dicts
@@ -8,22 +11,24 @@ def generate_ai_insight(company_name, indicator_analysis):
     }
     """
 
-    not_reported = [i for i in indicator_analysis if i["status"] == "Not Reported"]
-    partial = [i for i in indicator_analysis if i["status"] == "Partial"]
+    # One pass over the statuses instead of a filtered copy per status
+    counts = Counter(i["status"] for i in indicator_analysis)
+    not_reported = counts["Not Reported"]
+    partial = counts["Partial"]
 
     insights = []
 
     # 🔴 Critical gaps
     if not_reported:
         insights.append(
-            f"❗ {company_name} has {len(not_reported)} indicators not reported, "
+            f"❗ {company_name} has {not_reported} indicators not reported, "
             "which significantly impacts GRI readiness and transparency."
         )
 
     # 🟡 Data quality issues
     if partial:
         insights.append(
-            f"⚠️ {company_name} shows partial reporting in {len(partial)} indicators, "
+            f"⚠️ {company_name} shows partial reporting in {partial} indicators, "
             "indicating gaps in data collection or consistency."
         )
 
@@ -3,22 +3,30 @@
 from typing import List, Dict
 from src.llm_engine import chat_completion
 
+SYSTEM_PROMPT = {"role": "system", "content": "You are a sustainability expert."}
+
+# Conversation turns kept for the LLM (one turn = user + assistant message)
+MAX_TURNS = 20
+
 class ChatAgent:
 
     def __init__(self):
-        self.history: List[Dict[str, str]] = []
+        self.history: List[Dict[str, str]] = [SYSTEM_PROMPT]
 
     def reset(self):
-        self.history = []
+        self.history = [SYSTEM_PROMPT]
 
     def ask(self, user_input: str, mode: str):
+        # history already starts with the system prompt → sent as-is, no copy
         self.history.append({"role": "user", "content": user_input})
 
-        messages = [{"role": "system", "content": "You are a sustainability expert."}]
-        messages.extend(self.history)
-
-        response = chat_completion(messages, mode)
+        response = chat_completion(self.history, mode)
 
         self.history.append({"role": "assistant", "content": response})
 
+        # Bound prompt size: drop the oldest turns, keep the system prompt
+        excess = len(self.history) - (2 * MAX_TURNS + 1)
+        if excess > 0:
+            del self.history[1:1 + excess]
+
         return response
@@ -1,16 +1,34 @@
 import os
+import re
+from functools import lru_cache
+from importlib.util import find_spec
+
 import pandas as pd
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 COMPANY_DIR = os.path.join(BASE_DIR, "data", "companies")
 
+_UNNAMED_RE = re.compile(r"Unnamed:.*")
+
+# Rust-based reader when python-calamine is installed, else pandas' default (openpyxl)
+EXCEL_ENGINE = "calamine" if find_spec("python_calamine") else None
+
 # ================================
 # ✅ LIST FILES
 # ================================
 def list_company_files():
-    if not os.path.exists(COMPANY_DIR):
+    try:
+        dir_mtime = os.stat(COMPANY_DIR).st_mtime_ns
+    except OSError:
         return []
-    return [f for f in os.listdir(COMPANY_DIR) if f.endswith(".xlsx")]
+    return list(_scan_company_files(COMPANY_DIR, dir_mtime))
+
+
+@lru_cache(maxsize=1)
+def _scan_company_files(directory, dir_mtime):
+    # Re-scanned only when the folder changes (file added / removed / renamed)
+    with os.scandir(directory) as entries:
+        return tuple(e.name for e in entries if e.name.endswith(".xlsx") and e.is_file())
 
 # ================================
 # ✅ LOAD ALL SHEETS
@@ -21,25 +39,76 @@ def load_company_file(filename):
     if not os.path.exists(path):
         raise FileNotFoundError(f"File not found: {path}")
 
-    xls = pd.ExcelFile(path)
+    # In-process memo keyed by mtime: an edited workbook is a new key.
+    # Callers get a copy so they can't mutate the cached frame.
+    return _load_company_frame(path, os.path.getmtime(path)).copy()
+
+
+@lru_cache(maxsize=32)
+def _load_company_frame(path, mtime):
+    return _with_schema(_read_company_excel(path))
+
+
+def _with_schema(df):
+    # Column roles resolved once per load; row filters / copies keep attrs
+    df.attrs["metric_col"], df.attrs["year_cols"] = _detect_schema(df)
+    return df
+
+
+def _detect_schema(df):
+    metric_col = next((c for c in df.columns if "metric" in c.lower()), None)
+    year_cols = sorted([c for c in df.columns if str(c).isdigit()], key=int)
+    return metric_col, year_cols
+
+
+def _schema(df):
+    # (metric_col, year_cols) from load-time attrs, scanning only for
+    # frames that did not come from load_company_file
+    if "year_cols" in df.attrs:
+        return df.attrs["metric_col"], df.attrs["year_cols"]
+    return _detect_schema(df)
+
+
+def _read_company_excel(path):
+    # One workbook open for every sheet
+    sheets = pd.read_excel(path, sheet_name=None, engine=EXCEL_ENGINE)
     all_sheets = []
 
-    for sheet in xls.sheet_names:
-        df = pd.read_excel(path, sheet_name=sheet)
+    for sheet, df in sheets.items():
 
         df.columns = (
             df.columns.astype(str)
             .str.strip()
-            .str.replace("Unnamed:.*", "", regex=True)
+            .str.replace(_UNNAMED_RE, "", regex=True)
         )
 
         df = df.dropna(axis=1, how="all")
         df["Category"] = sheet.strip()
-        df = df.apply(pd.to_numeric, errors="ignore")
 
         all_sheets.append(df)
 
     full_df = pd.concat(all_sheets, ignore_index=True)
+
+    # Year columns → numeric once ("—", "Not Reported*" → NaN)
+    year_cols = [c for c in full_df.columns if str(c).isdigit()]
+    full_df[year_cols] = full_df[year_cols].apply(pd.to_numeric, errors="coerce")
+
+    # Sheets may label their metrics in different columns (Magnolia:
+    # "Additional Metrics (Energy)" on Energy, "Metric" elsewhere). The
+    # detected metric column (the first one) gets each row's first
+    # filled label, so every category keeps its own names.
+    metric_cols = [c for c in full_df.columns if "metric" in c.lower()]
+    if len(metric_cols) > 1:
+        label = full_df[metric_cols[0]]
+        for col in metric_cols[1:]:
+            label = label.where(label.notna(), full_df[col])
+        full_df[metric_cols[0]] = label
+
+    # Repeated labels → categorical codes
+    label_cols = ["Category"] + metric_cols
+    for col in label_cols:
+        full_df[col] = full_df[col].astype("category")
+
     return full_df
 
 # ================================
@@ -53,27 +122,23 @@ def compute_kpis_by_category(df, selected_category):
     if cat_df.empty:
         return {}
 
-    metric_col = None
-    for col in cat_df.columns:
-        if "metric" in col.lower():
-            metric_col = col
+    metric_col, year_cols = _schema(df)
 
     if not metric_col:
         return {}
 
-    year_cols = [c for c in cat_df.columns if str(c).isdigit()]
     if not year_cols:
         return {}
 
-    latest_year = sorted(year_cols, key=lambda x: int(x))[-1]
+    latest_year = year_cols[-1]
 
-    for _, row in cat_df.iterrows():
-        try:
-            name = str(row[metric_col]).strip()
-            value = float(row[latest_year])
+    # Whole columns at once; later rows still win for repeated names
+    names = cat_df[metric_col].astype(str).str.strip().tolist()
+    values = pd.to_numeric(cat_df[latest_year], errors="coerce").tolist()
+
+    for name, value in zip(names, values):
+        if not pd.isna(value):
             kpis[name] = round(value, 2)
-        except:
-            continue
 
     return kpis
 
@@ -83,10 +148,7 @@ def compute_kpis_by_category(df, selected_category):
 def get_trend_data(df, selected_category, metric_name):
     cat_df = df[df["Category"] == selected_category]
 
-    metric_col = None
-    for col in cat_df.columns:
-        if "metric" in col.lower():
-            metric_col = col
+    metric_col, year_cols = _schema(df)
 
     if not metric_col:
         return None
@@ -95,10 +157,8 @@ def get_trend_data(df, selected_category, metric_name):
     if row.empty:
         return None
 
-    year_cols = [c for c in row.columns if str(c).isdigit()]
-
     data = {}
-    for y in sorted(year_cols):
+    for y in year_cols:
         try:
             data[y] = float(row.iloc[0][y])
         except:
@@ -1,12 +1,75 @@
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Flowable, PageBreak, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
-import matplotlib.pyplot as plt
+from reportlab.lib.utils import ImageReader
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image as PILImage
 import pandas as pd
 import numpy as np
 from io import BytesIO
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.kpi_service import batch_linear_forecast
+
+
+# One figure per image kind and thread, cleared and redrawn for every
+# chart/gauge. Figure objects (not pyplot) → no global figure registry,
+# an Agg canvas per figure, and threads never share an axes.
+_FIGURES = threading.local()
+
+
+# Fixed margins per image kind: laid out once instead of measuring a
+# tight bbox (a second full render) on every save
+_MARGINS = {
+    "chart": dict(left=0.11, right=0.97, bottom=0.12, top=0.88),
+    "gauge": dict(left=0.02, right=0.98, bottom=0.05, top=0.78),
+}
+
+
+def _figure(kind, figsize):
+    if not hasattr(_FIGURES, kind):
+        fig = Figure(figsize=figsize, dpi=100)
+        FigureCanvasAgg(fig)
+        fig.subplots_adjust(**_MARGINS[kind])
+        setattr(_FIGURES, kind, (fig, fig.add_subplot()))
+    return getattr(_FIGURES, kind)
+
+
+def _rgba_image(fig):
+    # Raw RGBA pixels straight from Agg: no PNG deflate here and no PNG
+    # decode in reportlab. print_to_buffer draws and copies, so the
+    # thread's figure can be redrawn while the image waits in the story.
+    rgba, size = fig.canvas.print_to_buffer()
+    return ImageReader(PILImage.frombuffer("RGBA", size, rgba, "raw", "RGBA", 0, 1))
+
+
+class _RasterImage(Flowable):
+    # platypus.Image only takes file names / file objects; this draws an
+    # in-memory ImageReader the same way (centred, scaled to the box)
+    def __init__(self, reader, width, height):
+        super().__init__()
+        self.reader = reader
+        self.width = width
+        self.height = height
+        self.hAlign = "CENTER"
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.reader, 0, 0, self.width, self.height, mask="auto")
+
+
+# Same KPI table look for every category (read-only once built)
+_KPI_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#003366")),
+    ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+])
 
 
 # ============================================
@@ -22,7 +85,8 @@ def generate_chart_image(df, title):
     if df.empty:
         return None
 
-    fig, ax = plt.subplots(figsize=(6, 3))
+    fig, ax = _figure("chart", (6, 3))
+    ax.clear()
     ax.plot(df.index, df["Value"], marker="o")
     ax.set_title(title)
     ax.grid(True)
@@ -31,11 +95,7 @@ def generate_chart_image(df, title):
     if pd.notna(ymax) and ymax > 0:
         ax.set_ylim(0, ymax * 1.2)
 
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png", dpi=150, bbox_inches="tight")
-    buffer.seek(0)
-    plt.close(fig)
-    return buffer
+    return _rgba_image(fig)
 
 
 # ============================================
@@ -51,25 +111,25 @@ def gauge_image(value, max_value, title):
     ratio = value / max_value
     color = "green" if ratio < 0.5 else "orange" if ratio < 0.8 else "red"
 
-    fig, ax = plt.subplots(figsize=(4, 2))
+    fig, ax = _figure("gauge", (4, 2))
+    ax.clear()
     ax.barh([0], [value], color=color)
     ax.set_xlim(0, max_value)
     ax.set_title(title)
     ax.axis("off")
 
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png", dpi=150, bbox_inches="tight")
-    buffer.seek(0)
-    plt.close(fig)
-    return buffer
+    return _rgba_image(fig)
 
 
 # ============================================
 # ✅ MAIN REPORT BUILDER (PDF SAFE)
 # ============================================
-def build_company_pdf(company_name, df, kpis, category=None):
+def build_company_pdf(company_name, df, kpis, category=None, out=None):
 
-    buffer = BytesIO()
+    # `out` may be any path or writable file object reportlab accepts (an
+    # open file, a response stream); the PDF is written there directly
+    # instead of into an in-memory buffer the caller then copies out
+    buffer = BytesIO() if out is None else out
     doc = SimpleDocTemplate(buffer, pagesize=A4)
     styles = getSampleStyleSheet()
     story = []
@@ -89,6 +149,15 @@ def build_company_pdf(company_name, df, kpis, category=None):
     metric_col = non_year_cols[0]
 
     year_cols = sorted([c for c in df.columns if str(c).strip().isdigit()], key=int)
+    X = np.array([int(c) for c in year_cols], dtype=np.float64)
+
+    # Year block as one float matrix for the whole report. load_company_file
+    # already stores these columns as floats, so coercion only runs for
+    # frames that still hold text.
+    year_block = df[year_cols]
+    if not all(pd.api.types.is_numeric_dtype(t) for t in year_block.dtypes):
+        year_block = year_block.apply(pd.to_numeric, errors="coerce")
+    Y_all = year_block.to_numpy(dtype=np.float64)
 
     gri_map = {
         "Energy": "302",
@@ -98,89 +167,103 @@ def build_company_pdf(company_name, df, kpis, category=None):
         "Waste": "306"
     }
 
-    # =======================
-    # GRI Sections
-    # =======================
-    for cat_name, gri_code in gri_map.items():
-        cat_df = df[df["Category"].str.lower().str.contains(cat_name.lower(), na=False)]
-        if cat_df.empty:
-            continue
-
-        story.append(Paragraph(f"<b>GRI {gri_code} — {cat_name}</b>", styles["Heading1"]))
-        story.append(Spacer(1, 10))
-
-        # -------- KPI TABLE --------
-        table_data = [["KPI", "Latest Value"]]
-        for _, row in cat_df.iterrows():
-            val = pd.to_numeric(row[year_cols[-1]], errors="coerce")
-            if pd.notna(val):
-                table_data.append([str(row[metric_col]), f"{val:,.2f}"])
-
-        table = Table(table_data, colWidths=[260, 140])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#003366")),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-            ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ]))
-        story.append(table)
-        story.append(Spacer(1, 15))
-
-        # -------- GAUGES --------
-        latest_vals = pd.to_numeric(cat_df[year_cols[-1]], errors="coerce")
-        max_val = latest_vals.max()
-
-        for _, row in cat_df.iterrows():
-            val = pd.to_numeric(row[year_cols[-1]], errors="coerce")
-            if pd.isna(val):
-                continue
-
-            gbuf = gauge_image(float(val), max_val, str(row[metric_col]))
-            if gbuf:
-                story.append(Image(gbuf, width=320, height=120))
-                story.append(Spacer(1, 10))
-
-        # -------- TRENDS --------
-        for _, row in cat_df.iterrows():
-            values = pd.to_numeric(row[year_cols], errors="coerce").dropna()
-            if len(values) < 2:
-                continue
-
-            trend_df = pd.DataFrame(
-                {"Value": values.values},
-                index=values.index.astype(int)
-            )
-
-            buf = generate_chart_image(trend_df, f"{row[metric_col]} Trend")
-            if buf:
-                story.append(Image(buf, width=420, height=180))
-                story.append(Spacer(1, 10))
-
-        # -------- PREDICTION --------
-        for _, row in cat_df.iterrows():
-            values = pd.to_numeric(row[year_cols], errors="coerce").dropna()
-            if len(values) < 3:
-                continue
-
-            X = values.index.astype(int).values
-            Y = values.values.astype(float)
-
-            if np.any(np.isnan(Y)) or np.any(np.isinf(Y)):
+    # Row positions per category, grouped once; each section matches on
+    # the category names instead of lower-casing every row again
+    category_rows = df.groupby("Category", observed=True, sort=False).indices
+
+    # Chart / gauge PNGs render on worker threads (thread-local figures)
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool:
+
+        # =======================
+        # GRI Sections
+        # =======================
+        for cat_name, gri_code in gri_map.items():
+            matched = [
+                rows for cat, rows in category_rows.items()
+                if cat_name.lower() in str(cat).lower()
+            ]
+            if not matched:
                 continue
 
-            model = np.poly1d(np.polyfit(X, Y, 1))
-            next_year = int(X.max()) + 1
-            pred = float(model(next_year))
-
-            story.append(
-                Paragraph(
-                    f"<b>{row[metric_col]} ({next_year} Prediction):</b> {pred:,.2f}",
-                    styles["Normal"]
-                )
-            )
-
-        story.append(PageBreak())
+            rows = np.sort(np.concatenate(matched))
+            cat_df = df.iloc[rows]
+
+            story.append(Paragraph(f"<b>GRI {gri_code} — {cat_name}</b>", styles["Heading1"]))
+            story.append(Spacer(1, 10))
+
+            # Every section below reads this category's slice of the matrix
+            names = [str(n) for n in cat_df[metric_col]]
+            Y = Y_all[rows]
+            latest_vals = Y[:, -1]
+            present = ~np.isnan(Y)
+            # Reported years per row, counted once; sparse rows skip the
+            # trend chart without a per-row reduction
+            counts = present.sum(axis=1)
+            max_val = pd.Series(latest_vals).max()
+            years = X.astype(int)
+
+            # One least-squares solve for every KPI row of the category
+            next_years = np.where(present, X, -np.inf).max(axis=1) + 1
+            preds = batch_linear_forecast(X, Y, next_years, min_points=3)
+
+            # One pass per metric fills every section (PNG renders run on the
+            # pool); sections are emitted afterwards in their usual order
+            table_data = [["KPI", "Latest Value"]]
+            gauges, trends, predictions = [], [], []
+
+            for name, raw_name, row_vals, row_present, count, next_year, pred in zip(
+                names, cat_df[metric_col], Y, present, counts, next_years, preds
+            ):
+                val = row_vals[-1]
+
+                if not np.isnan(val):
+                    table_data.append([name, f"{val:,.2f}"])
+
+                    gauges.append(pool.submit(gauge_image, float(val), max_val, name))
+
+                if count >= 2:
+                    trend_df = pd.DataFrame(
+                        {"Value": row_vals[row_present]},
+                        index=years[row_present]
+                    )
+
+                    trends.append(pool.submit(generate_chart_image, trend_df, f"{name} Trend"))
+
+                if not np.isnan(pred):
+                    predictions.append(
+                        Paragraph(
+                            f"<b>{raw_name} ({int(next_year)} Prediction):</b> {pred:,.2f}",
+                            styles["Normal"]
+                        )
+                    )
+
+            # -------- KPI TABLE --------
+            table = Table(table_data, colWidths=[260, 140])
+            table.setStyle(_KPI_TABLE_STYLE)
+            story.append(table)
+            story.append(Spacer(1, 15))
+
+            # -------- GAUGES --------
+            for job in gauges:
+                gauge = job.result()
+                if gauge is not None:
+                    story.append(_RasterImage(gauge, width=320, height=120))
+                    story.append(Spacer(1, 10))
+
+            # -------- TRENDS --------
+            for job in trends:
+                chart = job.result()
+                if chart is not None:
+                    story.append(_RasterImage(chart, width=420, height=180))
+                    story.append(Spacer(1, 10))
+
+            # -------- PREDICTION --------
+            story += predictions
+
+            story.append(PageBreak())
 
     # =======================
     doc.build(story)
-    buffer.seek(0)
+    if out is None:
+        buffer.seek(0)
     return buffer
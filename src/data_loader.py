@@ -1,13 +1,20 @@
 import os
 import re
 import pandas as pd
+from functools import lru_cache
 from pathlib import Path
+from importlib.util import find_spec
+
+from src.config import INDICATORS
 
 # =========================
 # ✅ CONFIG
 # =========================
 DATA_DIR = Path("data/Excel")
 
+# Rust-based reader when python-calamine is installed, else pandas' default (openpyxl)
+EXCEL_ENGINE = "calamine" if find_spec("python_calamine") else None
+
 # =========================
 # ✅ MONTH NORMALIZATION
 # =========================
@@ -42,27 +49,53 @@ def normalize_month(value):
         pass
     raise ValueError(f"Unrecognized month format: {value}")
 
+
+def normalize_month_series(months: pd.Series) -> pd.Series:
+    # A month column holds a handful of distinct spellings: normalize each
+    # once, then map the whole column in one vectorized lookup
+    return months.map({value: normalize_month(value) for value in months.unique()})
+
 # =========================
 # ✅ LIST YEARS FROM FILES
 # =========================
 def list_available_years():
+    try:
+        dir_mtime = os.stat(DATA_DIR).st_mtime_ns
+    except OSError:
+        return {}
+    return dict(_scan_year_files(DATA_DIR, dir_mtime))
+
+
+@lru_cache(maxsize=1)
+def _scan_year_files(directory, dir_mtime):
+    # Re-globbed only when the folder changes (file added / removed / renamed)
     years = {}
-    for file in DATA_DIR.glob("*.xlsx"):
+    for file in directory.glob("*.xlsx"):
         found = re.findall(r"\d{4}", file.name)
         if found:
             years[int(found[0])] = file
-    return dict(sorted(years.items()))
+    return tuple(sorted(years.items()))
 
 # =========================
 # ✅ READ ALL SHEETS + MERGE
 # =========================
+@lru_cache(maxsize=32)
+def _read_workbook(file_path: str, mtime_ns: int) -> dict:
+    # Every sheet of one workbook, parsed once per file version; the
+    # mtime in the key drops stale entries when a workbook is edited.
+    # Callers must not mutate the cached frames.
+    return pd.read_excel(file_path, sheet_name=None, engine=EXCEL_ENGINE)
+
+
+def _workbook_sheets(file_path: Path) -> dict:
+    return _read_workbook(str(file_path), os.stat(file_path).st_mtime_ns)
+
+
 def read_all_sheets(file_path: Path) -> pd.DataFrame:
-    xls = pd.ExcelFile(file_path)
     all_frames = []
 
-    for sheet_name in xls.sheet_names:
-        df = pd.read_excel(xls, sheet_name=sheet_name)
-        df["__sheet__"] = sheet_name   # لتتبع المصدر لو احتجنا
+    for sheet_name, df in _workbook_sheets(file_path).items():
+        df = df.assign(__sheet__=sheet_name)   # لتتبع المصدر لو احتجنا
         all_frames.append(df)
 
     return pd.concat(all_frames, ignore_index=True)
@@ -84,7 +117,7 @@ def load_year_dataframe(year: int) -> pd.DataFrame:
 
     df = df.copy()
     df["Year"] = pd.to_numeric(df["Year"], errors="coerce").astype("Int64")
-    df["Month"] = df["Month"].apply(normalize_month)
+    df["Month"] = normalize_month_series(df["Month"])
     df["Value"] = pd.to_numeric(df["Value"], errors="coerce").fillna(0)
 
     df_year = df[df["Year"] == int(year)].copy()
@@ -92,6 +125,41 @@ def load_year_dataframe(year: int) -> pd.DataFrame:
 
     return df_year
 
+# =========================
+# ✅ LOAD ONE INDICATOR (ALL YEARS)
+# =========================
+def load_indicator(key: str) -> pd.DataFrame:
+    """
+    Monthly rows of one indicator (see config.INDICATORS) across every
+    yearly workbook, sorted by Year and Month.
+    """
+    if key not in INDICATORS:
+        raise ValueError(f"Unknown indicator: {key}")
+
+    files = tuple(
+        (str(path), os.stat(path).st_mtime_ns)
+        for path in list_available_years().values()
+    )
+    return _load_indicator(INDICATORS[key].sheet_name, files).copy()
+
+
+@lru_cache(maxsize=8)
+def _load_indicator(sheet_name: str, files: tuple) -> pd.DataFrame:
+    frames = [
+        sheets[sheet_name]
+        for sheets in (_read_workbook(path, mtime) for path, mtime in files)
+        if sheet_name in sheets
+    ]
+    if not frames:
+        raise ValueError(f"No workbook contains the sheet '{sheet_name}'")
+
+    df = pd.concat(frames, ignore_index=True)
+    df["Year"] = pd.to_numeric(df["Year"], errors="coerce").astype("Int64")
+    df["Month"] = normalize_month_series(df["Month"])
+    df["Value"] = pd.to_numeric(df["Value"], errors="coerce").fillna(0)
+
+    return df.sort_values(["Year", "Month"], kind="stable", ignore_index=True)
+
 # =========================
 # ✅ CORE KPI FUNCTION (SINGLE SOURCE OF TRUTH)
 # =========================
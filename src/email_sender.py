@@ -4,7 +4,8 @@ import os
 from dotenv import load_dotenv
 import smtplib
 from email.message import EmailMessage
-from typing import Optional
+from io import BytesIO
+from typing import Optional, Union
 
 # Load environment variables
 root_dir = os.path.dirname(os.path.dirname(__file__))
@@ -38,7 +39,7 @@ def get_email_settings():
 
 def send_pdf_via_email(
     receiver_email: str,
-    pdf_bytes: bytes,
+    pdf_bytes: Union[bytes, BytesIO],
     pdf_name: str,
     year: int,
     cc: Optional[str] = None,
@@ -71,6 +72,10 @@ Sustainability AI Agent
 """
     )
 
+    # A BytesIO is attached through its buffer view, no bytes copy
+    if hasattr(pdf_bytes, "getbuffer"):
+        pdf_bytes = pdf_bytes.getbuffer()
+
     msg.add_attachment(
         pdf_bytes,
         maintype="application",
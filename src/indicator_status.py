@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 def indicator_status(values):
@@ -15,3 +16,30 @@ def indicator_status(values):
         return "Partial", coverage
 
     return "Reported", 100
+
+
+def indicator_status_batch(values):
+    """
+    Row-wise indicator_status over a whole year-column block.
+    Returns (status, coverage) arrays aligned with the rows.
+    """
+    arr = (
+        pd.DataFrame(values)
+        .apply(pd.to_numeric, errors="coerce")
+        .to_numpy(dtype=np.float64)
+    )
+
+    total = arr.shape[1]
+    reported = (~np.isnan(arr)).sum(axis=1)
+
+    coverage = np.round(reported * 100 / max(total, 1)).astype(int)
+    coverage[reported == total] = 100
+    coverage[reported == 0] = 0
+
+    status = np.select(
+        [reported == 0, reported < total],
+        ["Not Reported", "Partial"],
+        "Reported"
+    )
+
+    return status, coverage
@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
 
 
 def compute_yearly_totals(df: pd.DataFrame) -> pd.DataFrame:
@@ -27,13 +26,35 @@ def forecast_next_year(yearly_df: pd.DataFrame):
         last_val = float(yearly_df["total_value"].iloc[-1])
         return last_year + 1, last_val
 
-    X = yearly_df["Year"].values.reshape(-1, 1)
-    y = yearly_df["total_value"].values.reshape(-1, 1)
-
-    model = LinearRegression()
-    model.fit(X, y)
-
     next_year = int(yearly_df["Year"].max()) + 1
-    prediction = float(model.predict(np.array([[next_year]])).ravel()[0])
+    prediction = float(batch_linear_forecast(
+        yearly_df["Year"].to_numpy(dtype=np.float64),
+        yearly_df["total_value"].to_numpy(dtype=np.float64),
+        next_year,
+    )[0])
 
     return next_year, prediction
+
+
+def batch_linear_forecast(x, Y, next_x, min_points=2):
+    """
+    Least-squares line for every row of Y against x in one pass (NaNs ignored).
+    Returns the prediction at next_x (scalar or per-row array);
+    rows with fewer than `min_points` values get NaN.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+
+    mask = np.isfinite(Y)
+    n = mask.sum(axis=1)
+    Y0 = np.where(mask, Y, 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.where(mask, x, 0.0).sum(axis=1) / n
+        y_mean = Y0.sum(axis=1) / n
+        dx = np.where(mask, x - x_mean[:, None], 0.0)
+        slope = (dx * (Y0 - y_mean[:, None])).sum(axis=1) / (dx ** 2).sum(axis=1)
+
+    prediction = y_mean + slope * (np.asarray(next_x, dtype=np.float64) - x_mean)
+    prediction[n < min_points] = np.nan
+    return prediction
@@ -1,6 +1,7 @@
 # src/llm_engine.py
 
 import os
+import json
 from typing import Dict, List
 from dotenv import load_dotenv
 from groq import Groq
@@ -29,3 +30,79 @@ def chat_completion(messages: List[Dict[str, str]]):
         return resp.choices[0].message.content  # ✅ SDK الجديد
     except Exception as e:
         return f"❌ LLM Error: {str(e)}"
+
+
+# -----------------------------
+# KPI ANSWERS
+# -----------------------------
+_SYSTEM_PROMPT = (
+    "You are a professional Sustainability & GRI Expert AI. "
+    "Use only the numbers given in the context; never invent figures."
+)
+
+
+def generate_sustainability_answer(query: str, context: Dict) -> str:
+    """
+    Answer one question with its KPI context (indicator, yearly totals,
+    narratives, forecast). Raises if the LLM call fails.
+    """
+    messages = [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": f"Question:\n{query}\n\nContext:\n{json.dumps(context, default=str)}",
+        },
+    ]
+
+    reply = chat_completion(messages)
+    if reply.startswith("❌ LLM Error"):
+        raise RuntimeError(reply)
+
+    return reply
+
+
+# Past ~8 questions per prompt the round-trip saving flattens out
+MAX_LLM_BATCH = 8
+
+
+def generate_sustainability_answer_batch(queries: List[str], contexts: List[Dict]) -> List[str]:
+    """
+    Answer several questions with one chat completion. Each question is sent
+    with its own KPI context; the reply is a JSON array with one answer per
+    question, so numbered lists or "2023: ..." lines inside an answer cannot
+    be mistaken for answer boundaries.
+    Raises if the call fails or the reply does not hold one answer per question.
+    """
+    blocks = [
+        f"Question {i}: {q}\nContext {i}: {json.dumps(ctx, default=str)}"
+        for i, (q, ctx) in enumerate(zip(queries, contexts), start=1)
+    ]
+
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                f"{_SYSTEM_PROMPT} "
+                "Answer every question separately, using only its own context. "
+                f"Reply with a JSON array of exactly {len(queries)} strings, "
+                "one answer per question in the order asked, and nothing else."
+            ),
+        },
+        {"role": "user", "content": "\n\n".join(blocks)},
+    ]
+
+    reply = chat_completion(messages)
+    if reply.startswith("❌ LLM Error"):
+        raise RuntimeError(reply)
+
+    # Tolerate a code fence or a sentence around the array
+    answers = json.loads(reply[reply.find("["):reply.rfind("]") + 1])
+
+    if (
+        not isinstance(answers, list)
+        or len(answers) != len(queries)
+        or not all(isinstance(a, str) for a in answers)
+    ):
+        raise ValueError("Batched LLM reply could not be split per question")
+
+    return [a.strip() for a in answers]
@@ -5,10 +5,13 @@
 # =========================================
 
 from io import BytesIO
+from functools import lru_cache
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -32,6 +35,8 @@ ASSETS_DIR = os.path.join(BASE_DIR, "assets")
 LOCAL_LOGO_PATH = os.path.join(ASSETS_DIR, "company_logo.png")
 
 # --------------------------- STYLES ----------------------------
+# Built once per process; the report only reads these styles
+@lru_cache(maxsize=1)
 def _get_styles():
     styles = getSampleStyleSheet()
 
@@ -56,27 +61,58 @@ def _get_styles():
 
     return styles
 
+# Table styles shared by every section (read-only once built)
+_KPI_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0A3D62")),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+])
+
+_APPENDIX_TABLE_STYLE = TableStyle([
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f2f2f2")),
+])
+
 # ---------------------- COLORED CHART GENERATOR --------------------------
+# One trend figure per thread, cleared for every chart: no pyplot figure
+# registry and no new figure/canvas per indicator (saves through Agg)
+_TREND_FIGURE = threading.local()
+
+
+def _trend_axes():
+    if not hasattr(_TREND_FIGURE, "ax"):
+        _TREND_FIGURE.ax = Figure(figsize=(7, 3), dpi=100).add_subplot()
+    return _TREND_FIGURE.ax
+
+
 def _plot_yearly_trend(yearly_df, title: str, unit: str) -> BytesIO:
     buf = BytesIO()
 
     years = yearly_df["Year"].astype(int)
     vals = yearly_df["total_value"]
 
-    plt.figure(figsize=(7, 3), dpi=140)
-    plt.plot(
+    ax = _trend_axes()
+    fig = ax.figure
+    ax.clear()
+    ax.plot(
         years, vals,
         marker="o",
         linewidth=2.5,
         color="#0A3D62"
     )
-    plt.fill_between(years, vals, color="#6fa8dc", alpha=0.25)
-    plt.title(title, fontsize=11)
-    plt.ylabel(unit, fontsize=9)
-    plt.grid(axis="y", linestyle="--", alpha=0.5)
-    plt.tight_layout()
-    plt.savefig(buf, format="png", bbox_inches="tight")
-    plt.close()
+    ax.fill_between(years, vals, color="#6fa8dc", alpha=0.25)
+    ax.set_title(title, fontsize=11)
+    ax.set_ylabel(unit, fontsize=9)
+    ax.grid(axis="y", linestyle="--", alpha=0.5)
+    # Layout solved in place (no tight-bbox second render); fast zlib
+    # level and no metadata, reportlab re-encodes the pixels anyway
+    fig.tight_layout()
+    fig.savefig(
+        buf, format="png",
+        metadata={"Software": None},
+        pil_kwargs={"compress_level": 3},
+    )
 
     buf.seek(0)
     return buf
@@ -166,6 +202,15 @@ def build_full_gri_report(company_name: str, gri_data_dict: dict) -> BytesIO:
         "306": "Waste Management (GRI 306)",
     }
 
+    # Trend charts render together on worker threads (thread-local
+    # figures); each section then picks its PNG up in order
+    charts = {}
+    with ThreadPoolExecutor(max_workers=min(len(gri_titles), os.cpu_count() or 1)) as pool:
+        for gri_code, title in gri_titles.items():
+            yearly_df = gri_data_dict.get(gri_code)
+            if yearly_df is not None and not yearly_df.empty:
+                charts[gri_code] = pool.submit(_plot_yearly_trend, yearly_df, title, "")
+
     for gri_code, title in gri_titles.items():
 
         story.append(Paragraph(title, styles["SectionHeader"]))
@@ -179,7 +224,7 @@ def build_full_gri_report(company_name: str, gri_data_dict: dict) -> BytesIO:
             continue
 
         # -------- KPI SUMMARY TABLE --------
-        latest = yearly_df.sort_values("Year").iloc[-1]
+        latest = yearly_df.loc[yearly_df["Year"].idxmax()]
         latest_year = int(latest["Year"])
         latest_value = latest["total_value"]
 
@@ -190,20 +235,13 @@ def build_full_gri_report(company_name: str, gri_data_dict: dict) -> BytesIO:
         ]
 
         kpi_table = Table(kpi_data, colWidths=[6 * cm, 8 * cm])
-        kpi_table.setStyle(
-            TableStyle([
-                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0A3D62")),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ])
-        )
+        kpi_table.setStyle(_KPI_TABLE_STYLE)
 
         story.append(kpi_table)
         story.append(Spacer(1, 0.4 * cm))
 
         # -------- COLORED TREND CHART --------
-        chart = _plot_yearly_trend(yearly_df, title, "")
+        chart = charts[gri_code].result()
         story.append(Image(chart, width=15 * cm, height=4.5 * cm))
         story.append(Spacer(1, 0.6 * cm))
 
@@ -222,20 +260,14 @@ def build_full_gri_report(company_name: str, gri_data_dict: dict) -> BytesIO:
             story.append(Spacer(1, 0.6 * cm))
             continue
 
-        table_data = [["Year", "Total"]]
-        for _, r in yearly_df.iterrows():
-            table_data.append([
-                int(r["Year"]),
-                _format_num(r["total_value"])
-            ])
+        # Straight from the column arrays: no per-row Series boxing
+        table_data = [["Year", "Total"]] + [
+            [int(year), _format_num(total)]
+            for year, total in zip(yearly_df["Year"].tolist(), yearly_df["total_value"].tolist())
+        ]
 
         table = Table(table_data, colWidths=[4 * cm, 6 * cm])
-        table.setStyle(
-            TableStyle([
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f2f2f2")),
-            ])
-        )
+        table.setStyle(_APPENDIX_TABLE_STYLE)
 
         story.append(table)
         story.append(Spacer(1, 0.6 * cm))
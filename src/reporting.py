@@ -1,7 +1,16 @@
 from typing import Optional
+import numpy as np
 import pandas as pd
 
 
+NARRATIVE_NAMES = {
+    "energy": "Energy consumption",
+    "water": "Water withdrawal and consumption",
+    "emissions": "GHG emissions performance",
+    "waste": "Waste generation and disposal",
+}
+
+
 def build_indicator_narrative(
     indicator_key: str,
     df: pd.DataFrame,
@@ -23,22 +32,19 @@ def build_indicator_narrative(
 
     total = df_year["Value"].sum()
 
-    # Monthly pattern analysis
-    peak_month = df_year.loc[df_year["Value"].idxmax()]["Month"]
-    peak_value = df_year["Value"].max()
+    # Monthly pattern analysis: positions in the value array instead of
+    # materializing the peak / low rows
+    values = df_year["Value"].to_numpy(dtype=float)
+    months = df_year["Month"].to_numpy()
+
+    peak = np.nanargmax(values)
+    peak_month, peak_value = months[peak], values[peak]
 
-    low_month = df_year.loc[df_year["Value"].idxmin()]["Month"]
-    low_value = df_year["Value"].min()
+    low = np.nanargmin(values)
+    low_month, low_value = months[low], values[low]
 
     # Basic narrative depending on indicator type
-    names = {
-        "energy": "Energy consumption",
-        "water": "Water withdrawal and consumption",
-        "emissions": "GHG emissions performance",
-        "waste": "Waste generation and disposal",
-    }
-
-    name = names.get(indicator_key, "KPI performance")
+    name = NARRATIVE_NAMES.get(indicator_key, "KPI performance")
 
     text = (
         f"In {year}, the organization reported a total {name.lower()} "
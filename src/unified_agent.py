@@ -12,17 +12,39 @@ class UnifiedAgent:
             "excels": {},   # name -> {sheet: df}
             "chat": []
         }
+        # Document context for ask(), rebuilt only after an upload
+        self._context_text = None
 
     def upload_pdf(self, name: str, pdf_bytes: bytes):
         text = extract_text_from_pdf_bytes(pdf_bytes)
         self.memory["pdfs"][name] = text
+        self._context_text = None
         return text[:1500]
 
     def upload_excel(self, name: str, excel_bytes: bytes):
         sheets = load_excel_file_bytes(excel_bytes)
         self.memory["excels"][name] = sheets
+        self._context_text = None
         return list(sheets.keys())
 
+    def _context(self) -> str:
+        # PDF extracts and sheet previews only change on upload, so the
+        # to_string() rendering is done once instead of on every question
+        if self._context_text is None:
+            context_text = ""
+
+            for name, txt in self.memory["pdfs"].items():
+                context_text += f"\nPDF ({name}) Extract:\n{txt[:2000]}\n"
+
+            for name, sheets in self.memory["excels"].items():
+                context_text += f"\nExcel ({name}) Sheets:\n"
+                for sname, df in sheets.items():
+                    context_text += f"\nSheet: {sname}\n{df.head().to_string()}\n"
+
+            self._context_text = context_text
+
+        return self._context_text
+
     def ask(self, question: str, mode="general"):
         system_prompt = """
 You are a professional Sustainability & GRI Expert AI.
@@ -34,17 +56,7 @@ Capabilities:
 - Never invent numbers if documents are provided
 """
 
-        context_text = ""
-
-        if self.memory["pdfs"]:
-            for name, txt in self.memory["pdfs"].items():
-                context_text += f"\nPDF ({name}) Extract:\n{txt[:2000]}\n"
-
-        if self.memory["excels"]:
-            for name, sheets in self.memory["excels"].items():
-                context_text += f"\nExcel ({name}) Sheets:\n"
-                for sname, df in sheets.items():
-                    context_text += f"\nSheet: {sname}\n{df.head().to_string()}\n"
+        context_text = self._context()
 
         messages = [
             {"role": "system", "content": system_prompt},